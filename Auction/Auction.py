@@ -0,0 +1,124 @@
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import List, Optional, Sequence, Tuple
+
+from Instrument.Instrument import Instrument
+from Trade.TradeBuffer import TradeSlice
+
+try:
+    import numpy as np
+except ImportError: ## the pure-Python pass gives the same answer, just slower on very deep books
+    np = None
+
+## below this many candidate prices the NumPy call overhead outweighs the vectorised pass
+_NUMPY_MIN_PRICES = 64
+
+
+@dataclass
+class AuctionCommand:
+    """Journaled marker for the book entering (``begin=True``) or leaving a call auction."""
+    _begin: bool
+
+    @property
+    def begin(self) -> bool:
+        return self._begin
+
+    @begin.setter
+    def begin(self, begin: bool):
+        if not isinstance(begin, bool):
+            raise ValueError("begin must be an instance of bool")
+        self._begin = begin
+
+
+@dataclass
+class AuctionResult:
+    """Outcome of an uncross: the single clearing price, what traded there and what was left over.
+
+    ``imbalance`` is demand minus supply at the clearing price, so a positive
+    value means bids were left unfilled at that price.
+    """
+    _price_ticks: Optional[int]
+    _volume: int
+    _imbalance: int
+    _trades: TradeSlice
+    _instrument: Instrument = field(repr=False)
+
+    @property
+    def price(self) -> Optional[float]:
+        return None if self._price_ticks is None else self._instrument.to_price(self._price_ticks)
+
+    @property
+    def price_ticks(self) -> Optional[int]:
+        return self._price_ticks
+
+    @property
+    def volume(self) -> int:
+        return self._volume
+
+    @property
+    def imbalance(self) -> int:
+        return self._imbalance
+
+    @property
+    def trades(self) -> TradeSlice:
+        return self._trades
+
+    def __repr__(self):
+        return f"AuctionResult({self._volume} @ {self.price}, imbalance={self._imbalance}, fills={len(self._trades)})"
+
+
+def clearing_price(bids: Sequence[Tuple[int, int]], asks: Sequence[Tuple[int, int]]) -> Tuple[Optional[int], int, int]:
+    """Price that maximises executed volume when ``bids`` and ``asks`` are uncrossed at one price.
+
+    ``bids`` and ``asks`` are ``(price_ticks, quantity)`` per level, each with
+    distinct prices in any order. At every candidate price the demand is the
+    bid quantity at or above it and the supply the ask quantity at or below
+    it; the volume that can trade is the smaller of the two. Ties on volume go
+    to the smallest absolute imbalance, then to the middle candidate.
+    Returns ``(price_ticks, volume, imbalance)``, with a None price when the
+    book does not cross.
+    """
+    if not bids or not asks:
+        return None, 0, 0
+    prices = sorted({price for price, _ in bids} | {price for price, _ in asks})
+    if np is not None and len(prices) >= _NUMPY_MIN_PRICES:
+        return _clearing_price_numpy(prices, bids, asks)
+
+    index = {price: i for i, price in enumerate(prices)}
+    bid_at, ask_at = [0] * len(prices), [0] * len(prices)
+    for price, quantity in bids:
+        bid_at[index[price]] = quantity
+    for price, quantity in asks:
+        ask_at[index[price]] = quantity
+    demand = list(accumulate(reversed(bid_at)))[::-1]
+    supply = list(accumulate(ask_at))
+    volumes = [min(d, s) for d, s in zip(demand, supply)]
+    volume = max(volumes)
+    if volume == 0:
+        return None, 0, 0
+    candidates = [i for i, v in enumerate(volumes) if v == volume]
+    least = min(abs(demand[i] - supply[i]) for i in candidates)
+    candidates = [i for i in candidates if abs(demand[i] - supply[i]) == least]
+    best = candidates[(len(candidates) - 1) // 2]
+    return prices[best], volume, demand[best] - supply[best]
+
+
+def _clearing_price_numpy(prices: List[int], bids: Sequence[Tuple[int, int]], asks: Sequence[Tuple[int, int]]) -> Tuple[Optional[int], int, int]:
+    grid = np.asarray(prices, dtype=np.int64)
+    bid_at = np.zeros(len(grid), dtype=np.int64)
+    ask_at = np.zeros(len(grid), dtype=np.int64)
+    bid_prices, bid_quantities = np.asarray(bids, dtype=np.int64).reshape(-1, 2).T
+    ask_prices, ask_quantities = np.asarray(asks, dtype=np.int64).reshape(-1, 2).T
+    bid_at[np.searchsorted(grid, bid_prices)] = bid_quantities
+    ask_at[np.searchsorted(grid, ask_prices)] = ask_quantities
+    demand = np.cumsum(bid_at[::-1])[::-1]
+    supply = np.cumsum(ask_at)
+    volumes = np.minimum(demand, supply)
+    volume = int(volumes.max())
+    if volume == 0:
+        return None, 0, 0
+    candidates = np.flatnonzero(volumes == volume)
+    imbalances = np.abs(demand[candidates] - supply[candidates])
+    candidates = candidates[imbalances == imbalances.min()]
+    best = int(candidates[(len(candidates) - 1) // 2])
+    return int(grid[best]), volume, int(demand[best] - supply[best])
@@ -0,0 +1,92 @@
+"""A crossed order flood uncrossed by a call auction versus matched continuously.
+
+Generates a seeded flood of GoodTillCancel orders on both sides of a mid
+price, with overlapping limits so most of it crosses, and feeds the same
+flood into two direct-call books. The continuous book matches every order as
+it arrives. The auction book collects them between ``begin_auction`` and
+``end_auction`` and uncrosses once at the price that maximises volume. The
+collect and uncross phases are timed separately, and the volume, fills and
+resting orders each book ends up with are printed so the outcomes can be
+compared, not only the timings.
+
+    python -m Benchmarks.AuctionUncross
+    python -m Benchmarks.AuctionUncross --orders 500000 --spread 50
+"""
+import argparse
+import logging
+import random
+import time
+from typing import List
+
+from Order.Order import Order
+from Order.OrderEnums import OrderSide, OrderType
+from Orderbook.Orderbook import OrderBook
+
+MID_PRICE = 10_000
+
+
+def flood(rng: random.Random, count: int, spread: int) -> List[Order]:
+    """Bids and asks with limits drawn around the mid, so buyers and sellers overlap by up to ``spread`` ticks."""
+    orders = []
+    for order_id in range(1, count + 1):
+        side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+        skew = spread // 4 if side == OrderSide.BUY else -(spread // 4)
+        price = MID_PRICE + skew + rng.randint(-spread // 2, spread // 2)
+        orders.append(Order(OrderType.GoodTillCancel, order_id, side, float(price), rng.randint(1, 100)))
+    return orders
+
+
+def run_continuous(orders: List[Order], buffer_size: int) -> dict:
+    book = OrderBook(use_threads=False, trade_buffer_size=buffer_size)
+    start = time.perf_counter()
+    fills = volume = 0
+    for order in orders:
+        trades = book.add_order(order)
+        fills += len(trades)
+        volume += order.initial_quantity - order.remaining_quantity
+    elapsed = time.perf_counter() - start
+    result = {"collect_s": elapsed, "uncross_s": 0.0, "total_s": elapsed, "volume": volume, "fills": fills,
+              "resting": book.size(), "price": None}
+    book.shutdown()
+    return result
+
+
+def run_auction(orders: List[Order], buffer_size: int) -> dict:
+    book = OrderBook(use_threads=False, trade_buffer_size=buffer_size)
+    start = time.perf_counter()
+    book.begin_auction()
+    for order in orders:
+        book.add_order(order)
+    collected = time.perf_counter()
+    auction = book.end_auction()
+    finished = time.perf_counter()
+    result = {"collect_s": collected - start, "uncross_s": finished - collected, "total_s": finished - start,
+              "volume": auction.volume, "fills": len(auction.trades), "resting": book.size(), "price": auction.price}
+    book.shutdown()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--spread", type=int, default=20, help="width in ticks of each side's price range")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    ## room for every fill either way, so the auction's trade slice stays readable
+    buffer_size = 1 << max(16, (2 * args.orders).bit_length())
+    print(f"{'mode':<11} {'orders/s':>10} {'collect s':>10} {'uncross s':>10} {'total s':>8} {'volume':>11} {'fills':>9} "
+          f"{'resting':>8} {'price':>8}")
+    baseline = None
+    for mode, runner in (("continuous", run_continuous), ("auction", run_auction)):
+        ## fresh Order objects per run, a book fills them in place
+        result = runner(flood(random.Random(args.seed), args.orders, args.spread), buffer_size)
+        baseline = baseline or result["total_s"]
+        print(f"{mode:<11} {args.orders / result['total_s']:>10,.0f} {result['collect_s']:>10.3f} {result['uncross_s']:>10.3f} "
+              f"{result['total_s']:>8.3f} {result['volume']:>11,} {result['fills']:>9,} {result['resting']:>8,} "
+              f"{str(result['price']):>8}  {baseline / result['total_s']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
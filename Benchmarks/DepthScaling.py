@@ -0,0 +1,101 @@
+"""Add latency as a function of resting book depth.
+
+Builds a non-crossing book with ``depth`` price levels per side, then times
+passive adds spread over those levels. With a sorted level index the per-add
+cost should stay roughly flat as the depth grows.
+
+Then, on an asks-only book of the same depth with its levels one tick
+apart, rests one stray sell at the smallest tick, times ``quantity_available`` across the real levels, and
+cancels the stray. Depth queries should stay O(log n) with the stray in the
+book, and the depth index should keep no outliers once it is gone.
+
+    python -m Benchmarks.DepthScaling
+"""
+import argparse
+import random
+import statistics
+import time
+
+from Order.Order import Order
+from Order.OrderEnums import OrderSide, OrderType
+from Orderbook.Orderbook import OrderBook
+
+MID_PRICE = 100_000
+
+
+def build_book(depth: int) -> OrderBook:
+    ob = OrderBook(use_threads=False)
+    order_id = 1
+    for i in range(1, depth + 1):
+        ob.add_order(Order(OrderType.GoodTillCancel, order_id, OrderSide.BUY, float(MID_PRICE - i), 10))
+        ob.add_order(Order(OrderType.GoodTillCancel, order_id + 1, OrderSide.SELL, float(MID_PRICE + i), 10))
+        order_id += 2
+    return ob
+
+
+def time_adds(ob: OrderBook, depth: int, samples: int, rng: random.Random) -> list:
+    latencies = []
+    order_id = 10_000_000
+    for _ in range(samples):
+        offset = rng.randint(1, depth)
+        if rng.random() < 0.5:
+            order = Order(OrderType.GoodTillCancel, order_id, OrderSide.BUY, float(MID_PRICE - offset), 5)
+        else:
+            order = Order(OrderType.GoodTillCancel, order_id, OrderSide.SELL, float(MID_PRICE + offset), 5)
+        start = time.perf_counter_ns()
+        ob.add_order(order)
+        latencies.append(time.perf_counter_ns() - start)
+        order_id += 1
+    return latencies
+
+
+def time_stray_queries(depth: int, samples: int, rng: random.Random) -> tuple:
+    """Median ``quantity_available`` latency with a stray best ask resting, and ask outliers left after cancelling it."""
+    ob = OrderBook(use_threads=False)
+    tick = ob.instrument.tick_size
+    try:
+        for i in range(1, depth + 1):
+            ob.add_order(Order(OrderType.GoodTillCancel, i, OrderSide.SELL, MID_PRICE + i * tick, 10))
+        stray_id = depth + 1
+        ob.add_order(Order(OrderType.GoodTillCancel, stray_id, OrderSide.SELL, tick, 1))
+        latencies = []
+        for _ in range(samples):
+            price = MID_PRICE + rng.randint(1, depth) * tick
+            start = time.perf_counter_ns()
+            ob.quantity_available(OrderSide.BUY, price)
+            latencies.append(time.perf_counter_ns() - start)
+        ob.cancel_order(stray_id)
+        outliers = ob.stats()["gauges"]["ask_depth_outliers"]
+    finally:
+        ob.shutdown()
+    return statistics.median(latencies), outliers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depths", type=int, nargs="+", default=[10, 100, 1_000, 10_000])
+    parser.add_argument("--samples", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'depth':>8} {'median ns':>10} {'p99 ns':>10}")
+    for depth in args.depths:
+        ob = build_book(depth)
+        try:
+            latencies = sorted(time_adds(ob, depth, args.samples, rng))
+        finally:
+            ob.shutdown()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"{depth:>8} {statistics.median(latencies):>10.0f} {p99:>10}")
+
+    print(f"\n{'depth':>8} {'query ns':>10} {'outliers':>10}  (stray best ask, outliers after cancelling it)")
+    for depth in args.depths:
+        median, outliers = time_stray_queries(depth, args.samples, rng)
+        print(f"{depth:>8} {median:>10.0f} {outliers:>10}")
+        if outliers:
+            raise SystemExit(f"depth index kept {outliers} outliers after the stray order was cancelled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Aggregate Exchange throughput as the number of shard processes grows.
+
+Sends the same seeded flow of limit orders over ``--symbols`` instruments in
+batches and reports messages per second for each shard count. On a machine
+with enough cores the rate should grow close to linearly with the shards.
+
+    python -m Benchmarks.ExchangeScaling --shards 1 2 4 8
+"""
+import argparse
+import logging
+import random
+import time
+
+from Exchange.Exchange import Exchange
+from Instrument.Instrument import Instrument
+from Order.Order import Order
+from Order.OrderEnums import OrderSide, OrderType
+
+
+def build_flow(symbols, orders_per_symbol: int, batch: int, seed: int):
+    rng = random.Random(seed)
+    flow = []
+    for symbol in symbols:
+        orders = []
+        for order_id in range(1, orders_per_symbol + 1):
+            side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+            offset = rng.randint(0, 20) if side == OrderSide.BUY else rng.randint(-20, 0)
+            orders.append(Order(OrderType.GoodTillCancel, order_id, side, float(1_000 - offset), rng.randint(1, 10)))
+        flow.extend((symbol, orders[i:i + batch]) for i in range(0, len(orders), batch))
+    rng.shuffle(flow)
+    return flow
+
+
+def run(shards: int, symbols, flow) -> float:
+    exchange = Exchange([Instrument(symbol, 1.0) for symbol in symbols], shards=shards)
+    try:
+        start = time.perf_counter()
+        futures = [exchange.submit_batch(symbol, batch) for symbol, batch in flow]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+    finally:
+        exchange.shutdown()
+    return sum(len(batch) for _, batch in flow) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--symbols", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=10_000, help="orders per symbol")
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    symbols = [f"SYM{i:03d}" for i in range(args.symbols)]
+    flow = build_flow(symbols, args.orders, args.batch, args.seed)
+    baseline = None
+    print(f"{'shards':>6} {'msg/s':>12} {'speedup':>8}")
+    for shards in args.shards:
+        rate = run(shards, symbols, flow)
+        baseline = baseline or rate
+        print(f"{shards:>6} {rate:>12,.0f} {rate / baseline:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Latency and throughput of the OrderBook hot paths under seeded workloads.
+
+Each workload builds a book (untimed), then times every command of a seeded
+flow one at a time and reports ops/sec and p50/p99/p99.9 latency per kind of
+operation:
+
+    deep_book     passive adds, cancels and modifies spread over a deep book
+    cancel_heavy  mostly cancels, with adds near the touch to keep the book alive
+    sweep         FillAndKill orders that take out several whole levels, then refill them
+    market_sweep  the same with Market orders
+    quote_update  market-maker style modifies: size reductions at the same price, and reprices
+    fok_burst     bursts of FillOrKill orders, half of them too large to fill
+
+Every workload runs against OrderBook with ``use_threads=False`` (direct
+calls) and ``use_threads=True`` (submitted to the executor and waited on);
+``--modes sequenced`` adds the single matcher thread. Results are written as
+JSON tagged with the git commit, and ``--compare`` prints the change against
+an earlier run.
+
+    python -m Benchmarks.HotPaths --output before.json
+    python -m Benchmarks.HotPaths --output after.json --compare before.json
+"""
+import argparse
+from collections import defaultdict
+import json
+import logging
+import math
+import platform
+import random
+import subprocess
+import time
+from typing import Callable, Dict, List, Tuple
+
+from Order.Order import Order
+from Order.OrderEnums import OrderSide, OrderType
+from Order.OrderModify import OrderModify
+from Orderbook.Orderbook import OrderBook
+
+MID_PRICE = 10_000
+PERCENTILES = (("p50", 0.5), ("p99", 0.99), ("p99.9", 0.999))
+MODES = {
+    "direct": dict(use_threads=False),
+    "threads": dict(use_threads=True),
+    "sequenced": dict(use_threads=True, sequenced=True),
+}
+
+## (label reported under, command kind, payload); kind is one of "add", "cancel" or "modify"
+Command = Tuple[str, str, object]
+
+
+class _Flow:
+    """Hands out order ids and keeps the setup commands apart from the measured ones."""
+
+    def __init__(self):
+        self.setup: List[Command] = []
+        self.measured: List[Command] = []
+        self._next_id = 1
+
+    def order(self, order_type: OrderType, side: OrderSide, price: int, quantity: int) -> Order:
+        order = Order(order_type, self._next_id, side, float(price), quantity)
+        self._next_id += 1
+        return order
+
+
+def _price(side: OrderSide, offset: int) -> int:
+    """Price ``offset`` ticks away from the mid on the passive side for ``side``."""
+    return MID_PRICE - offset if side == OrderSide.BUY else MID_PRICE + offset
+
+
+def _opposite(side: OrderSide) -> OrderSide:
+    return OrderSide.SELL if side == OrderSide.BUY else OrderSide.BUY
+
+
+def _ladder(flow: _Flow, levels: int, orders_per_level: int, quantity: int) -> List[Tuple[int, OrderSide]]:
+    live = []
+    for offset in range(1, levels + 1):
+        for side in (OrderSide.BUY, OrderSide.SELL):
+            for _ in range(orders_per_level):
+                order = flow.order(OrderType.GoodTillCancel, side, _price(side, offset), quantity)
+                flow.setup.append(("add", "add", order))
+                live.append((order.order_id, side))
+    return live
+
+
+def _take(live: List[Tuple[int, OrderSide]], rng: random.Random) -> Tuple[int, OrderSide]:
+    index = rng.randrange(len(live))
+    live[index], live[-1] = live[-1], live[index]
+    return live.pop()
+
+
+def deep_book(rng: random.Random, ops: int, depth: int) -> _Flow:
+    flow = _Flow()
+    live = _ladder(flow, depth, 4, 10)
+    while len(flow.measured) < ops:
+        r = rng.random()
+        if live and r < 0.3:
+            order_id, _ = _take(live, rng)
+            flow.measured.append(("cancel", "cancel", order_id))
+        elif live and r < 0.5:
+            order_id, side = live[rng.randrange(len(live))]
+            modify = OrderModify(order_id, side, float(_price(side, rng.randint(1, depth))), rng.randint(1, 20))
+            flow.measured.append(("modify", "modify", modify))
+        else:
+            side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+            order = flow.order(OrderType.GoodTillCancel, side, _price(side, rng.randint(1, depth)), rng.randint(1, 20))
+            flow.measured.append(("add", "add", order))
+            live.append((order.order_id, side))
+    return flow
+
+
+def cancel_heavy(rng: random.Random, ops: int, depth: int) -> _Flow:
+    flow = _Flow()
+    live = _ladder(flow, min(depth, 200), 5, 10)
+    while len(flow.measured) < ops:
+        if live and rng.random() < 0.85:
+            order_id, _ = _take(live, rng)
+            flow.measured.append(("cancel", "cancel", order_id))
+        else:
+            side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+            order = flow.order(OrderType.GoodTillCancel, side, _price(side, rng.randint(1, 10)), rng.randint(1, 20))
+            flow.measured.append(("add", "add", order))
+            live.append((order.order_id, side))
+    return flow
+
+
+def sweep(rng: random.Random, ops: int, depth: int, order_type: OrderType = OrderType.FillAndKill) -> _Flow:
+    """Every sweep empties the ``levels`` best levels of one side exactly; the refill puts them back as they were."""
+    orders_per_level, quantity = 4, 10
+    flow = _Flow()
+    _ladder(flow, depth, orders_per_level, quantity)
+    while len(flow.measured) < ops:
+        resting_side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+        levels = rng.randint(1, 10)
+        price = 0 if order_type == OrderType.Market else _price(resting_side, levels)
+        aggressor = flow.order(order_type, _opposite(resting_side), price, levels * orders_per_level * quantity)
+        flow.measured.append(("sweep", "add", aggressor))
+        for offset in range(1, levels + 1):
+            for _ in range(orders_per_level):
+                order = flow.order(OrderType.GoodTillCancel, resting_side, _price(resting_side, offset), quantity)
+                flow.measured.append(("add", "add", order))
+    return flow
+
+
+def market_sweep(rng: random.Random, ops: int, depth: int) -> _Flow:
+    return sweep(rng, ops, depth, OrderType.Market)
+
+
+def quote_update(rng: random.Random, ops: int, depth: int) -> _Flow:
+    """Every order stays passive, so the flow knows each order's price and open quantity without simulating fills."""
+    levels = min(depth, 100)
+    flow = _Flow()
+    live = _ladder(flow, levels, 5, 20)
+    quotes = {order.order_id: (int(order.price), order.initial_quantity) for _, _, order in flow.setup}
+    while len(flow.measured) < ops:
+        order_id, side = live[rng.randrange(len(live))]
+        price, quantity = quotes[order_id]
+        if quantity > 1 and rng.random() < 0.7:
+            quantity = rng.randint(1, quantity - 1)
+            label = "reduce"
+        else:
+            price, quantity = _price(side, rng.randint(1, levels)), rng.randint(1, 20)
+            label = "reprice"
+        quotes[order_id] = (price, quantity)
+        flow.measured.append((label, "modify", OrderModify(order_id, side, float(price), quantity)))
+    return flow
+
+
+def fok_burst(rng: random.Random, ops: int, depth: int) -> _Flow:
+    """Bursts of 50 FillOrKill orders; what the filled ones took is put back at the touch after each burst."""
+    flow = _Flow()
+    _ladder(flow, min(depth, 100), 4, 10)
+    while len(flow.measured) < ops:
+        taken = {OrderSide.BUY: 0, OrderSide.SELL: 0}
+        for _ in range(50):
+            resting_side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+            limit = _price(resting_side, 3)
+            if rng.random() < 0.5:
+                quantity = rng.randint(1, 20)
+                taken[resting_side] += quantity
+                label = "fok_fill"
+            else:
+                quantity = 10_000 ## more than the first three levels ever hold
+                label = "fok_kill"
+            order = flow.order(OrderType.FillOrKill, _opposite(resting_side), limit, quantity)
+            flow.measured.append((label, "add", order))
+        for side, quantity in taken.items():
+            if quantity:
+                order = flow.order(OrderType.GoodTillCancel, side, _price(side, 1), quantity)
+                flow.measured.append(("add", "add", order))
+    return flow
+
+
+WORKLOADS: Dict[str, Callable[[random.Random, int, int], _Flow]] = {
+    "deep_book": deep_book,
+    "cancel_heavy": cancel_heavy,
+    "sweep": sweep,
+    "market_sweep": market_sweep,
+    "quote_update": quote_update,
+    "fok_burst": fok_burst,
+}
+
+
+def percentile(ordered: List[int], fraction: float) -> int:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run(workload: str, mode: str, ops: int, depth: int, seed: int, metrics: bool = False) -> dict:
+    flow = WORKLOADS[workload](random.Random(seed), ops, depth)
+    book = OrderBook(metrics=metrics, **MODES[mode])
+    try:
+        direct = {"add": book.add_order, "cancel": book.cancel_order, "modify": book.order_modify}
+        for _, kind, payload in flow.setup:
+            direct[kind](payload)
+
+        submit = {"add": book.submit_add_order, "cancel": book.submit_cancel_order, "modify": book.submit_order_modify}
+        calls = direct if mode == "direct" else submit
+        waits = mode != "direct"
+        latencies: Dict[str, List[int]] = defaultdict(list)
+        clock = time.perf_counter_ns
+        start = clock()
+        for label, kind, payload in flow.measured:
+            call = calls[kind]
+            began = clock()
+            result = call(payload)
+            if waits:
+                result.result()
+            latencies[label].append(clock() - began)
+        elapsed = clock() - start
+    finally:
+        book.shutdown()
+
+    operations = {}
+    for label, samples in sorted(latencies.items()):
+        samples.sort()
+        stats = {"count": len(samples), "ops_per_sec": len(samples) * 1e9 / sum(samples)}
+        stats.update((name, percentile(samples, fraction)) for name, fraction in PERCENTILES)
+        stats["max"] = samples[-1]
+        operations[label] = stats
+    return {"ops_per_sec": len(flow.measured) * 1e9 / elapsed, "operations": operations}
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def report(results: dict, baseline: dict = None):
+    print(f"{'workload':<13} {'mode':<10} {'operation':<10} {'count':>7} {'ops/s':>10} "
+          f"{'p50 ns':>9} {'p99 ns':>9} {'p99.9 ns':>9}" + (f" {'p50 vs base':>12}" if baseline else ""))
+    for workload, modes in results.items():
+        for mode, result in modes.items():
+            for label, stats in result["operations"].items():
+                line = (f"{workload:<13} {mode:<10} {label:<10} {stats['count']:>7} {stats['ops_per_sec']:>10,.0f} "
+                        f"{stats['p50']:>9} {stats['p99']:>9} {stats['p99.9']:>9}")
+                if baseline:
+                    before = baseline.get(workload, {}).get(mode, {}).get("operations", {}).get(label)
+                    line += f" {(stats['p50'] / before['p50'] - 1) * 100:>+11.1f}%" if before else f" {'-':>12}"
+                print(line)
+            print(f"{workload:<13} {mode:<10} {'(all)':<10} {'':>7} {result['ops_per_sec']:>10,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=["direct", "threads"])
+    parser.add_argument("--ops", type=int, default=20_000, help="measured commands per workload")
+    parser.add_argument("--depth", type=int, default=1_000, help="price levels per side in the starting book")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--metrics", action="store_true", help="build the books with metrics=True to see what recording costs")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON from an earlier run to compare p50 latencies against")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"comparing against {baseline['commit']}")
+
+    results = {workload: {mode: run(workload, mode, args.ops, args.depth, args.seed, args.metrics) for mode in args.modes}
+               for workload in args.workloads}
+    report(results, baseline and baseline["results"])
+
+    if args.output:
+        document = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "parameters": {"ops": args.ops, "depth": args.depth, "seed": args.seed, "metrics": args.metrics},
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Open-loop load against OrderBook from simulated clients, swept over arrival rates.
+
+Each of ``--clients`` threads sends adds and cancels on a precomputed
+schedule: Poisson arrivals, or bursts of ``--burst`` messages whose start
+times are Poisson. A client never waits for a reply before sending the next
+message, and latency is measured from the time a message was *meant* to be
+sent, not from when it actually went out, so a stalled engine shows up as
+queueing delay instead of silently slowing the load down (coordinated
+omission). The service time from the actual send is reported alongside.
+
+Rates are swept in order; the knee is the first rate the book can no longer
+keep up with, either because completed throughput falls short of the target
+or because p99 latency jumps well past its low-load value. The clients share
+the interpreter with the book, so the rates here are what one process can
+both generate and absorb.
+
+    python -m Benchmarks.LoadGenerator --rates 2000 5000 10000 20000 40000
+    python -m Benchmarks.LoadGenerator --mode sequenced --arrivals bursty --burst 50 --output load.json
+"""
+import argparse
+from collections import deque
+from concurrent.futures import Future, wait
+import json
+import logging
+import platform
+import random
+import threading
+import time
+from typing import Deque, List, Tuple
+
+from Benchmarks.HotPaths import MODES, PERCENTILES, git_commit, percentile
+from Order.Order import Order
+from Order.OrderEnums import OrderSide, OrderType
+from Orderbook.Orderbook import OrderBook
+
+MID_PRICE = 10_000
+## a run stops being sustainable once throughput falls this far short of the target ...
+THROUGHPUT_SHORTFALL = 0.95
+## ... or p99 grows this many times over the lowest rate's
+LATENCY_BLOWUP = 10
+
+
+class Client(threading.Thread):
+    """One simulated client: sends its schedule open loop and records corrected latencies."""
+
+    def __init__(self, book: OrderBook, index: int, clients: int, schedule: List[Tuple[int, bool]], seed: int):
+        super().__init__(name=f"load-client-{index}", daemon=True)
+        self._book = book
+        self._schedule = schedule ## (send offset in ns, is cancel), offsets from the common start
+        self._rng = random.Random(seed)
+        self._next_id = 1_000_000 + index
+        self._stride = clients ## every client owns the ids congruent to its index
+        self._live: Deque[int] = deque() ## ids whose add has completed and may still rest
+        self.latencies: List[int] = [] ## completion - intended send
+        self.service: List[int] = [] ## completion - actual send
+        self.lag: List[int] = [] ## actual send - intended send, how far the generator itself fell behind
+        self.futures: List[Future] = []
+        self.start_ns = 0
+
+    def run(self):
+        clock = time.perf_counter_ns
+        rng, live, book = self._rng, self._live, self._book
+        for offset, is_cancel in self._schedule:
+            intended = self.start_ns + offset
+            delay = intended - clock()
+            if delay > 0:
+                time.sleep(delay / 1e9)
+            if is_cancel and live:
+                order_id = live.popleft()
+                result = book.submit_cancel_order(order_id)
+                order_id = None
+            else:
+                side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+                ## mostly passive near the touch, one in ten crosses
+                offset_ticks = rng.randint(-2, 20) if rng.random() < 0.9 else -rng.randint(1, 5)
+                price = MID_PRICE - offset_ticks if side == OrderSide.BUY else MID_PRICE + offset_ticks
+                order_id = self._next_id
+                self._next_id += self._stride
+                result = book.submit_add_order(Order(OrderType.GoodTillCancel, order_id, side, float(price), rng.randint(1, 20)))
+            sent = clock()
+            self.lag.append(sent - intended)
+            if isinstance(result, Future):
+                result.add_done_callback(self._completion(intended, sent, order_id))
+                self.futures.append(result)
+            else:
+                self._completed(intended, sent, order_id)
+
+    def _completion(self, intended: int, sent: int, order_id):
+        return lambda _: self._completed(intended, sent, order_id)
+
+    def _completed(self, intended: int, sent: int, order_id):
+        done = time.perf_counter_ns()
+        self.latencies.append(done - intended)
+        self.service.append(done - sent)
+        if order_id is not None:
+            self._live.append(order_id)
+
+
+def schedule(rng: random.Random, rate: float, duration: float, arrivals: str, burst: int, cancel_ratio: float) -> List[Tuple[int, bool]]:
+    """Send offsets in ns for one client sending ``rate`` messages a second on average."""
+    events, now, end = [], 0.0, duration * 1e9
+    size = burst if arrivals == "bursty" else 1
+    while True:
+        now += rng.expovariate(rate / size) * 1e9
+        if now >= end:
+            return events
+        events.extend((int(now), rng.random() < cancel_ratio) for _ in range(size))
+
+
+def build_book(mode: str, depth: int) -> OrderBook:
+    book = OrderBook(**MODES[mode])
+    order_id = 1
+    for offset in range(1, depth + 1):
+        for side in (OrderSide.BUY, OrderSide.SELL):
+            price = MID_PRICE - offset if side == OrderSide.BUY else MID_PRICE + offset
+            book.add_order(Order(OrderType.GoodTillCancel, order_id, side, float(price), 50))
+            order_id += 1
+    return book
+
+
+def run(mode: str, rate: float, args) -> dict:
+    rng = random.Random(args.seed)
+    book = build_book(mode, args.depth)
+    clients = [Client(book, i, args.clients, schedule(rng, rate / args.clients, args.duration, args.arrivals, args.burst, args.cancel_ratio),
+                      args.seed + i) for i in range(args.clients)]
+    try:
+        start = time.perf_counter_ns() + 10_000_000 ## give every thread time to reach its first send
+        for client in clients:
+            client.start_ns = start
+            client.start()
+        for client in clients:
+            client.join()
+        wait([future for client in clients for future in client.futures])
+        elapsed = (time.perf_counter_ns() - start) / 1e9
+    finally:
+        book.shutdown()
+
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    service = sorted(sample for client in clients for sample in client.service)
+    lag = sorted(sample for client in clients for sample in client.lag)
+    result = {"target": rate, "sent": len(latencies), "throughput": len(latencies) / elapsed}
+    result.update((name, percentile(latencies, fraction)) for name, fraction in PERCENTILES)
+    result["max"] = latencies[-1]
+    result["service p50"] = percentile(service, 0.5)
+    result["service p99"] = percentile(service, 0.99)
+    result["send lag p99"] = percentile(lag, 0.99)
+    return result
+
+
+def find_knee(results: List[dict]):
+    """Last rate that was still sustained, and the first one that was not."""
+    baseline = results[0]["p99"]
+    for previous, result in zip([None] + results, results):
+        if result["throughput"] < THROUGHPUT_SHORTFALL * result["target"] or result["p99"] > LATENCY_BLOWUP * baseline:
+            return (previous["target"] if previous else None), result["target"]
+    return results[-1]["target"], None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=list(MODES), default="threads")
+    parser.add_argument("--rates", type=float, nargs="+", default=[1_000, 2_000, 5_000, 10_000, 20_000, 40_000],
+                        help="target messages per second across all clients, swept in order")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds of load per rate")
+    parser.add_argument("--arrivals", choices=("poisson", "bursty"), default="poisson")
+    parser.add_argument("--burst", type=int, default=20, help="messages per burst with --arrivals bursty")
+    parser.add_argument("--cancel-ratio", type=float, default=0.4)
+    parser.add_argument("--depth", type=int, default=100, help="price levels per side in the starting book")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the sweep to this JSON file")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{args.mode} mode, {args.clients} clients, {args.arrivals} arrivals, {args.duration}s per rate")
+    print(f"{'target/s':>9} {'done/s':>9} {'p50 us':>9} {'p99 us':>9} {'p99.9 us':>9} {'max us':>9} "
+          f"{'svc p50':>9} {'svc p99':>9} {'lag p99':>9}")
+    results = []
+    for rate in sorted(args.rates):
+        result = run(args.mode, rate, args)
+        results.append(result)
+        print(f"{rate:>9,.0f} {result['throughput']:>9,.0f} "
+              + " ".join(f"{result[key] / 1e3:>9,.0f}" for key in ("p50", "p99", "p99.9", "max", "service p50", "service p99", "send lag p99")))
+
+    sustained, broken = find_knee(results)
+    if broken is None:
+        print(f"sustained every rate up to {sustained:,.0f}/s; raise --rates to find the knee")
+    else:
+        print(f"knee between {sustained or 0:,.0f}/s (sustained) and {broken:,.0f}/s (not sustained)")
+
+    if args.output:
+        document = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+            "knee": {"sustained": sustained, "not_sustained": broken},
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""What per-command logging costs the matching path, synchronous versus queued.
+
+Runs the same seeded HotPaths workloads on a direct-call book three ways:
+with INFO disabled, with INFO written synchronously through a file handler
+(the ``main.py`` configuration, but to a file), and with
+``OrderBook(async_logging=True)``, where the matching path only queues
+compact records and a background thread formats and writes them. Throughput
+is measured over the commands; draining what is still queued happens at
+shutdown and is reported separately.
+
+    python -m Benchmarks.LoggingOverhead
+    python -m Benchmarks.LoggingOverhead --workloads sweep --ops 50000
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+from Benchmarks.HotPaths import WORKLOADS, percentile
+from Orderbook.Orderbook import OrderBook
+
+SCENARIOS = {
+    "info off": (logging.WARNING, False),
+    "info sync": (logging.INFO, False),
+    "info async": (logging.INFO, True),
+}
+
+
+def run(workload: str, level: int, async_logging: bool, args, handler: logging.Handler) -> dict:
+    flow = WORKLOADS[workload](random.Random(args.seed), args.ops, args.depth)
+    root = logging.getLogger()
+    root.setLevel(logging.WARNING)
+    book = OrderBook(use_threads=False, async_logging=async_logging)
+    calls = {"add": book.add_order, "cancel": book.cancel_order, "modify": book.order_modify}
+    for _, kind, payload in flow.setup:
+        calls[kind](payload)
+
+    root.setLevel(level)
+    written_before = handler.stream.tell()
+    latencies = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for _, kind, payload in flow.measured:
+        began = clock()
+        calls[kind](payload)
+        latencies.append(clock() - began)
+    elapsed = clock() - start
+    book.shutdown()
+    drained = clock() - start - elapsed
+    root.setLevel(logging.WARNING)
+    handler.flush()
+
+    latencies.sort()
+    return {
+        "ops_per_sec": len(latencies) * 1e9 / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "drain_ms": drained / 1e6,
+        "log_mb": (handler.stream.tell() - written_before) / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=["deep_book", "sweep"])
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument("--depth", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix="orderbook-log-", suffix=".log")
+    os.close(fd)
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    logging.getLogger().addHandler(handler)
+    try:
+        print(f"{'workload':<13} {'logging':<11} {'ops/s':>9} {'vs off':>8} {'p50 ns':>9} {'p99 ns':>9} {'drain ms':>9} {'log MB':>7}")
+        for workload in args.workloads:
+            baseline = None
+            for scenario, (level, async_logging) in SCENARIOS.items():
+                result = run(workload, level, async_logging, args, handler)
+                baseline = baseline or result["ops_per_sec"]
+                print(f"{workload:<13} {scenario:<11} {result['ops_per_sec']:>9,.0f} {result['ops_per_sec'] / baseline:>7.2f}x "
+                      f"{result['p50']:>9} {result['p99']:>9} {result['drain_ms']:>9.1f} {result['log_mb']:>7.1f}")
+    finally:
+        logging.getLogger().removeHandler(handler)
+        handler.close()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Bytes of Python heap per resting order.
+
+Rests ``--orders`` non-crossing limit orders in a fresh book and reports the
+traced allocation growth divided by the number of resting orders. The
+caller's Order objects are dropped as soon as they are added, so only what
+the book itself retains is counted.
+
+    python -m Benchmarks.OrderMemory
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+
+from Order.Order import Order
+from Order.OrderEnums import OrderSide, OrderType
+from Orderbook.Orderbook import OrderBook
+
+
+def measure(orders: int, levels: int, seed: int) -> float:
+    rng = random.Random(seed)
+    ob = OrderBook(use_threads=False)
+    try:
+        gc.collect()
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        for order_id in range(1, orders + 1):
+            if order_id % 2:
+                side, price = OrderSide.BUY, float(1_000 - rng.randint(1, levels))
+            else:
+                side, price = OrderSide.SELL, float(1_000 + rng.randint(1, levels))
+            ob.add_order(Order(OrderType.GoodTillCancel, order_id, side, price, rng.randint(1, 100)))
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        resting = ob.size()
+    finally:
+        ob.shutdown()
+    return (after - before) / resting
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--levels", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    per_order = measure(args.orders, args.levels, args.seed)
+    print(f"{args.orders} resting orders over {args.levels} levels per side: {per_order:.1f} bytes/order")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import time
+
+
+class Clock:
+    """Source of time for an OrderBook, in nanoseconds since the epoch.
+
+    The book stamps arriving orders, cancels, modifies and fills from its
+    clock, so swapping in a ManualClock makes a run depend only on its input.
+    ``realtime`` tells the book whether background timers (the good-for-day
+    pruner) should run against this clock.
+    """
+    realtime = True
+
+    def now_ns(self) -> int:
+        raise NotImplementedError
+
+
+class WallClock(Clock):
+    realtime = True
+
+    def now_ns(self) -> int:
+        return time.time_ns()
+
+    def __repr__(self):
+        return "WallClock()"
+
+
+class ManualClock(Clock):
+    """Clock that only moves when told to, used to replay recorded flow at full speed."""
+    realtime = False
+
+    def __init__(self, start_ns: int = 0):
+        self._now = start_ns
+
+    def now_ns(self) -> int:
+        return self._now
+
+    def set(self, now_ns: int):
+        if now_ns < self._now:
+            raise ValueError(f"clock cannot move backwards from {self._now} to {now_ns}")
+        self._now = now_ns
+
+    def advance(self, delta_ns: int):
+        self.set(self._now + delta_ns)
+
+    def __repr__(self):
+        return f"ManualClock(now_ns={self._now})"
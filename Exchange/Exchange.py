@@ -0,0 +1,191 @@
+from concurrent.futures import Future
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from Exchange.SharedRing import SharedRing
+from Exchange.Shard import ERROR, REQUEST_HEADER, STOP, run_shard
+from Instrument.Instrument import Instrument
+from Order.Order import Order
+from Order.OrderCancel import OrderCancel
+from Order.OrderModify import OrderModify
+from Protocol.Codec import Message, decode_result, encode_message
+
+logger = logging.getLogger(__name__)
+
+
+def plan_placement(symbols: Sequence[str], shards: int, weights: Optional[Dict[str, float]] = None) -> Dict[str, int]:
+    """Spreads symbols over shards, heaviest first onto the least loaded shard.
+
+    ``weights`` is the expected relative load per symbol (for example messages
+    per second); symbols without a weight count as 1.
+    """
+    weights = weights or {}
+    load = [0.0] * shards
+    placement: Dict[str, int] = {}
+    for symbol in sorted(symbols, key=lambda s: (-weights.get(s, 1.0), s)):
+        shard = min(range(shards), key=lambda i: load[i])
+        placement[symbol] = shard
+        load[shard] += weights.get(symbol, 1.0)
+    return placement
+
+
+class Exchange:
+    """Routes orders by symbol to OrderBook shards running in separate processes.
+
+    Each shard process owns the books for the symbols placed on it and talks to
+    this process over a pair of shared-memory rings: commands go out encoded
+    with Protocol.Codec and results come back the same way, where a receiver
+    thread per shard completes the Future returned by the submit call. A
+    request the shard fails on fails its Future with RuntimeError, and the
+    shard carries on. If a shard process exits, or its results can no longer
+    be read, its outstanding and later requests fail the same way instead of
+    waiting forever.
+    """
+
+    def __init__(self, instruments: List[Instrument], shards: Optional[int] = None,
+                 placement: Optional[Dict[str, int]] = None, weights: Optional[Dict[str, float]] = None,
+                 ring_bytes: int = 1 << 22):
+        self._instruments: Dict[str, Instrument] = {instrument.symbol: instrument for instrument in instruments}
+        self._symbol_ids: Dict[str, int] = {symbol: i for i, symbol in enumerate(self._instruments)}
+        shards = shards or min(len(instruments), os.cpu_count() or 1)
+        self._placement = placement or plan_placement(list(self._instruments), shards, weights)
+        unknown = set(self._placement) ^ set(self._instruments)
+        if unknown:
+            raise ValueError(f"placement must cover exactly the exchange's symbols, mismatched: {sorted(unknown)}")
+        if any(not 0 <= shard < shards for shard in self._placement.values()):
+            raise ValueError(f"placement refers to shards outside 0..{shards - 1}")
+
+        self._request_ids = itertools.count()
+        self._pending: Dict[int, tuple] = {} ## request id -> (future, instrument, single message, shard)
+        self._dead_shards = set() ## shards that exited or whose receiver failed; their requests fail straight away
+        self._command_rings: List[SharedRing] = []
+        self._result_rings: List[SharedRing] = []
+        self._send_locks: List[threading.Lock] = [] ## rings are single-producer
+        self._processes = []
+        self._receivers = []
+        context = multiprocessing.get_context("spawn")
+
+        for shard in range(shards):
+            commands, results = SharedRing(capacity=ring_bytes), SharedRing(capacity=ring_bytes)
+            hosted = [(self._symbol_ids[symbol], symbol, self._instruments[symbol].tick_size)
+                      for symbol, placed in self._placement.items() if placed == shard]
+            process = context.Process(target=run_shard, args=(shard, hosted, commands.name, results.name),
+                                      name=f"orderbook-shard-{shard}", daemon=True)
+            process.start()
+            receiver = threading.Thread(target=self._receive, args=(shard, results, process), name=f"exchange-receiver-{shard}",
+                                        daemon=True)
+            receiver.start()
+            self._command_rings.append(commands)
+            self._result_rings.append(results)
+            self._send_locks.append(threading.Lock())
+            self._processes.append(process)
+            self._receivers.append(receiver)
+        logger.info(f"Exchange started {shards} shards for {len(self._instruments)} symbols")
+
+    @property
+    def placement(self) -> Dict[str, int]:
+        return dict(self._placement)
+
+    def submit_add_order(self, symbol: str, order: Order) -> Future:
+        return self._submit(symbol, [order], single=True)
+
+    def submit_cancel_order(self, symbol: str, order_id: int) -> Future:
+        return self._submit(symbol, [OrderCancel(order_id)], single=True)
+
+    def submit_order_modify(self, symbol: str, order: OrderModify) -> Future:
+        return self._submit(symbol, [order], single=True)
+
+    def submit_batch(self, symbol: str, messages: List[Message]) -> Future:
+        """Sends several commands for one symbol as a single record; the future resolves to one result per message."""
+        return self._submit(symbol, messages, single=False)
+
+    def _submit(self, symbol: str, messages: List[Message], single: bool) -> Future:
+        if symbol not in self._symbol_ids:
+            raise ValueError(f"Unknown symbol {symbol}")
+        if len(messages) >= ERROR:
+            raise ValueError(f"a batch can carry at most {ERROR - 1} messages")
+        for message in messages:
+            if not isinstance(message, (Order, OrderCancel, OrderModify)):
+                raise ValueError(f"Unsupported message {message!r}: expected Order, OrderCancel or OrderModify")
+        payload = b"".join(encode_message(message) for message in messages)
+        request_id = next(self._request_ids)
+        future = Future()
+        shard = self._placement[symbol]
+        self._pending[request_id] = (future, self._instruments[symbol], single, shard)
+        ## checked after registering, so either this call or the receiver that saw the shard die fails the future
+        if shard in self._dead_shards:
+            self._fail(request_id, RuntimeError(f"shard {shard} for {symbol} is down"))
+            return future
+
+        with self._send_locks[shard]:
+            self._command_rings[shard].put(REQUEST_HEADER.pack(request_id, self._symbol_ids[symbol], len(messages)) + payload)
+        return future
+
+    def _receive(self, shard: int, results: SharedRing, process):
+        try:
+            self._receive_results(shard, results, process)
+        except Exception as error:
+            ## nothing else reads this shard's results, so it can't answer anyone any more
+            logger.exception(f"Receiver for shard {shard} failed, failing its pending requests")
+            process.terminate()
+            self._on_shard_down(shard, f"shard {shard} stopped answering: receiver failed with {error!r}")
+
+    def _receive_results(self, shard: int, results: SharedRing, process):
+        while True:
+            payload = results.get_wait(timeout=0.5)
+            if payload is None:
+                if process.is_alive():
+                    continue
+                payload = results.get() ## whatever the shard wrote just before it exited
+                if payload is None:
+                    logger.error(f"Shard {shard} exited unexpectedly with code {process.exitcode}, failing its pending requests")
+                    self._on_shard_down(shard, f"shard {shard} exited with code {process.exitcode} before answering")
+                    return
+            request_id, _, count = REQUEST_HEADER.unpack_from(payload)
+            if count == STOP:
+                return
+            if count == ERROR:
+                self._fail(request_id, RuntimeError(f"shard {shard} failed the request: {payload[REQUEST_HEADER.size:].decode()}"))
+                continue
+            pending = self._pending.get(request_id)
+            if pending is None:
+                continue
+            future, instrument, single, _ = pending
+            replies = []
+            offset = REQUEST_HEADER.size
+            for _ in range(count):
+                reply, offset = decode_result(payload, offset, instrument)
+                replies.append(reply)
+            ## left pending until decoded, so a bad record fails this future along with the rest
+            if self._pending.pop(request_id, None) is not None:
+                future.set_result(replies[0] if single else replies)
+
+    def _fail(self, request_id: int, error: Exception):
+        pending = self._pending.pop(request_id, None)
+        if pending is not None:
+            pending[0].set_exception(error)
+
+    def _on_shard_down(self, shard: int, reason: str):
+        self._dead_shards.add(shard)
+        for request_id, pending in list(self._pending.items()):
+            if pending[3] == shard:
+                self._fail(request_id, RuntimeError(reason))
+
+    def shutdown(self):
+        """Stops every shard once it has answered all commands sent before this call."""
+        for shard, commands in enumerate(self._command_rings):
+            if shard in self._dead_shards: ## nobody left to drain its ring
+                continue
+            with self._send_locks[shard]:
+                commands.put(REQUEST_HEADER.pack(0, 0, STOP))
+        for process in self._processes:
+            process.join()
+        for receiver in self._receivers:
+            receiver.join()
+        for ring in self._command_rings + self._result_rings:
+            ring.close()
+        logger.info("Exchange shut down")
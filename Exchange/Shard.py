@@ -0,0 +1,54 @@
+import logging
+import struct
+from typing import Dict, List, Tuple
+
+from Exchange.SharedRing import SharedRing
+from Instrument.Instrument import Instrument
+from Orderbook.Orderbook import OrderBook
+from Protocol.Codec import decode_message, encode_result
+
+logger = logging.getLogger(__name__)
+
+## every ring record starts with the request id, the symbol id and the number of messages/results in it
+REQUEST_HEADER = struct.Struct('<QHH')
+STOP = 0xFFFF ## message count that tells a shard to shut down
+ERROR = 0xFFFE ## result count of a request that failed; the UTF-8 error message follows the header
+
+
+def run_shard(shard_id: int, instruments: List[Tuple[int, str, float]], command_ring: str, result_ring: str):
+    """Entry point of a shard process: owns the books for its symbols and serves the command ring."""
+    books: Dict[int, OrderBook] = {
+        symbol_id: OrderBook(use_threads=False, instrument=Instrument(symbol, tick_size))
+        for symbol_id, symbol, tick_size in instruments
+    }
+    commands = SharedRing(name=command_ring)
+    results = SharedRing(name=result_ring)
+    logger.info(f"Shard {shard_id} serving {len(books)} symbols")
+    try:
+        while True:
+            payload = commands.get_wait()
+            request_id, symbol_id, count = REQUEST_HEADER.unpack_from(payload)
+            if count == STOP:
+                results.put(REQUEST_HEADER.pack(request_id, 0, STOP)) ## lets the receiver know nothing else follows
+                break
+
+            try:
+                messages = []
+                offset = REQUEST_HEADER.size
+                for _ in range(count):
+                    message, offset = decode_message(payload, offset)
+                    messages.append(message)
+
+                book = books[symbol_id]
+                replies = book.apply_batch(messages)
+                result = REQUEST_HEADER.pack(request_id, symbol_id, len(replies)) + b"".join(encode_result(reply) for reply in replies)
+            except Exception as e:
+                ## fail this request only; the shard keeps serving the others
+                logger.exception(f"Shard {shard_id} failed request {request_id}")
+                result = REQUEST_HEADER.pack(request_id, symbol_id, ERROR) + f"{type(e).__name__}: {e}".encode()
+            results.put(result)
+    finally:
+        for book in books.values():
+            book.shutdown()
+        commands.close()
+        results.close()
@@ -0,0 +1,132 @@
+from multiprocessing.shared_memory import SharedMemory
+import struct
+import time
+from typing import Optional
+
+_LENGTH = struct.Struct('<I')
+_WRAP = 0xFFFFFFFF ## length marker telling the reader to continue at the start of the ring
+## header slots, in 8-byte words; the positions sit on separate cache lines
+_WRITE = 0
+_READ = 8
+_CAPACITY = 16
+_HEADER_SIZE = 192
+
+
+class SharedRing:
+    """Single-producer, single-consumer ring of byte records in shared memory.
+
+    Records are a 4-byte length followed by the payload, padded to 8 bytes so a
+    length field never straddles the end of the ring. The producer owns the
+    write position and the consumer the read position; each only ever reads the
+    other's, so no lock is needed between the two processes. Positions only
+    grow, and are stored and loaded as single aligned 8-byte words so the other
+    side never sees one half written. A record that does not fit before the end
+    of the ring is preceded by a wrap marker and written at the start instead.
+
+    Create the ring in one process with ``SharedRing(capacity=...)`` and attach
+    to it from the other with ``SharedRing(name=ring.name)``.
+    """
+
+    def __init__(self, name: Optional[str] = None, capacity: int = 1 << 22):
+        if name is None:
+            capacity = (capacity + 7) & ~7
+            self._shm = SharedMemory(create=True, size=_HEADER_SIZE + capacity)
+            self._shm.buf[:_HEADER_SIZE] = bytes(_HEADER_SIZE)
+            self._owner = True
+        else:
+            self._shm = SharedMemory(name=name)
+            self._owner = False
+        self._buf = self._shm.buf
+        ## struct.pack_into clears a field before writing it, a cast view stores the whole word at once
+        self._positions = self._buf[:_HEADER_SIZE].cast('Q')
+        if self._owner:
+            self._positions[_CAPACITY] = capacity
+        self._capacity = self._positions[_CAPACITY]
+        ## each side caches its own position, it is the only writer of it
+        self._write = self._positions[_WRITE]
+        self._read = self._positions[_READ]
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def put(self, payload: bytes):
+        """Appends a record, waiting with backoff while the consumer frees up space."""
+        length = len(payload)
+        record = (_LENGTH.size + length + 7) & ~7
+        capacity = self._capacity
+        if record > capacity // 2:
+            raise ValueError(f"record of {length} bytes is too large for a ring of {capacity} bytes")
+
+        write = self._write
+        offset = write % capacity
+        to_end = capacity - offset
+        needed = record if record <= to_end else to_end + record
+        spins = 0
+        positions = self._positions
+        while capacity - (write - positions[_READ]) < needed:
+            spins = _backoff(spins)
+
+        buf = self._buf
+        if record > to_end:
+            _LENGTH.pack_into(buf, _HEADER_SIZE + offset, _WRAP)
+            write += to_end
+            offset = 0
+        start = _HEADER_SIZE + offset
+        _LENGTH.pack_into(buf, start, length)
+        buf[start + _LENGTH.size:start + _LENGTH.size + length] = payload
+        self._write = write + record
+        positions[_WRITE] = self._write ## publish only after the payload is in place
+
+    def get(self) -> Optional[bytes]:
+        """Takes the next record, or returns None if the ring is empty."""
+        read = self._read
+        buf = self._buf
+        if self._positions[_WRITE] <= read:
+            return None
+        capacity = self._capacity
+        offset = read % capacity
+        length, = _LENGTH.unpack_from(buf, _HEADER_SIZE + offset)
+        if length == _WRAP:
+            read += capacity - offset
+            offset = 0
+            length, = _LENGTH.unpack_from(buf, _HEADER_SIZE)
+        start = _HEADER_SIZE + offset + _LENGTH.size
+        payload = bytes(buf[start:start + length])
+        self._read = read + ((_LENGTH.size + length + 7) & ~7)
+        self._positions[_READ] = self._read
+        return payload
+
+    def get_wait(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Like get(), but waits with backoff for up to ``timeout`` seconds (forever if None)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        spins = 0
+        while True:
+            payload = self.get()
+            if payload is not None:
+                return payload
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            spins = _backoff(spins)
+
+    def close(self):
+        self._positions.release()
+        self._positions = self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _backoff(spins: int) -> int:
+    """Spins briefly, then yields, then sleeps with a growing delay capped at 1ms."""
+    if spins < 64:
+        pass
+    elif spins < 128:
+        time.sleep(0)
+    else:
+        time.sleep(min(1e-3, 1e-5 * (spins - 127)))
+    return spins + 1
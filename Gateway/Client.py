@@ -0,0 +1,177 @@
+"""Pipelined asyncio client for the TCP gateway, with a loopback benchmark.
+
+    python -m Gateway.Client --local --messages 50000 --window 256
+    python -m Gateway.Client --host 127.0.0.1 --port 9000
+"""
+import argparse
+import asyncio
+import functools
+import itertools
+import logging
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+from Gateway.Protocol import FILL, REQUEST, RESPONSE, FrameReader, encode_frame
+from Instrument.Instrument import Instrument
+from Order.Order import Order
+from Order.OrderCancel import OrderCancel
+from Order.OrderEnums import OrderSide, OrderType
+from Protocol.Codec import Message, decode_result, decode_trade, encode_message
+from Trade.TradeInfo import Trade
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayClient:
+    """Sends commands without waiting for earlier ones; each send returns a future for its result.
+
+    Fills on this client's resting orders arrive unsolicited and are handed to
+    ``on_fill`` as (order_id, trade).
+    """
+
+    def __init__(self, instrument: Instrument, on_fill: Optional[Callable[[int, Trade], None]] = None):
+        self._instrument = instrument
+        self._on_fill = on_fill
+        self._tags = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._receiver: Optional[asyncio.Task] = None
+
+    async def connect(self, host: str = "127.0.0.1", port: int = 9000):
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._receiver = asyncio.create_task(self._receive())
+
+    def send(self, message: Message) -> asyncio.Future:
+        tag = next(self._tags)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[tag] = future
+        self._writer.write(encode_frame(REQUEST, tag, encode_message(message)))
+        return future
+
+    async def drain(self):
+        await self._writer.drain()
+
+    async def _receive(self):
+        frames = FrameReader()
+        try:
+            while True:
+                data = await self._reader.read(1 << 16)
+                if not data:
+                    break
+                for kind, tag, body in frames.feed(data):
+                    if kind == RESPONSE:
+                        result, _ = decode_result(body, 0, self._instrument)
+                        future = self._pending.pop(tag)
+                        if not future.done():
+                            future.set_result(result)
+                    elif kind == FILL and self._on_fill:
+                        trade, _ = decode_trade(body, 0, self._instrument)
+                        self._on_fill(tag, trade)
+        finally:
+            error = ConnectionError("gateway connection closed")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        if self._receiver:
+            await asyncio.gather(self._receiver, return_exceptions=True)
+
+
+def build_flow(count: int, seed: int) -> List[Message]:
+    """Limit orders around a fixed mid with roughly one cancel for every four adds."""
+    rng = random.Random(seed)
+    flow: List[Message] = []
+    live: List[int] = []
+    order_ids = itertools.count(1)
+    while len(flow) < count:
+        if live and rng.random() < 0.2:
+            flow.append(OrderCancel(live.pop(rng.randrange(len(live)))))
+            continue
+        order_id = next(order_ids)
+        side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+        offset = rng.randint(-5, 20)
+        price = 1_000 - offset if side == OrderSide.BUY else 1_000 + offset
+        flow.append(Order(OrderType.GoodTillCancel, order_id, side, float(price), rng.randint(1, 10)))
+        live.append(order_id)
+    return flow
+
+
+async def benchmark(host: str, port: int, instrument: Instrument, messages: int, window: int, seed: int):
+    fills = 0
+
+    def on_fill(order_id: int, trade: Trade):
+        nonlocal fills
+        fills += 1
+
+    client = GatewayClient(instrument, on_fill)
+    await client.connect(host, port)
+    flow = build_flow(messages, seed)
+    in_flight = asyncio.Semaphore(window)
+    latencies: List[int] = []
+
+    def done(sent_ns: int, future: asyncio.Future):
+        latencies.append(time.perf_counter_ns() - sent_ns)
+        in_flight.release()
+
+    start = time.perf_counter()
+    futures = []
+    for message in flow:
+        await in_flight.acquire()
+        future = client.send(message)
+        future.add_done_callback(functools.partial(done, time.perf_counter_ns()))
+        futures.append(future)
+    await asyncio.gather(*futures)
+    elapsed = time.perf_counter() - start
+    await client.close()
+
+    latencies.sort()
+    quantile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] / 1_000
+    print(f"{len(flow):,} messages, window {window}: {len(flow) / elapsed:,.0f} msg/s, {fills:,} passive fills")
+    print(f"round trip us: mean {statistics.fmean(latencies) / 1_000:.1f} "
+          f"p50 {quantile(0.5):.1f} p99 {quantile(0.99):.1f} p99.9 {quantile(0.999):.1f}")
+
+
+async def run_local(instrument: Instrument, messages: int, window: int, seed: int):
+    from Gateway.Server import GatewayServer
+    from Orderbook.Orderbook import OrderBook
+
+    book = OrderBook(instrument=instrument, sequenced=True)
+    server = await GatewayServer(book).start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        await benchmark("127.0.0.1", port, instrument, messages, window, seed)
+    finally:
+        server.close()
+        await server.wait_closed()
+        book.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--local", action="store_true", help="start a gateway in this process on a loopback port")
+    parser.add_argument("--symbol", default="DEMO")
+    parser.add_argument("--tick-size", type=float, default=0.01)
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--window", type=int, default=256, help="maximum requests in flight")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    instrument = Instrument(args.symbol, args.tick_size)
+    if args.local:
+        asyncio.run(run_local(instrument, args.messages, args.window, args.seed))
+    else:
+        asyncio.run(benchmark(args.host, args.port, instrument, args.messages, args.window, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Length-prefixed framing for the TCP gateway.
+
+Every frame is ``body length (u32), frame kind (u8), tag (u64)`` followed by
+the body. Clients send REQUEST frames whose body is one command encoded with
+Protocol.Codec and whose tag they choose freely; the server answers each one
+with a RESPONSE frame carrying the same tag and the encoded result. FILL
+frames are unsolicited: they tell the owner of a resting order that it
+traded, with the order id as the tag and one encoded trade as the body.
+"""
+import struct
+from typing import List, Tuple
+
+FRAME_HEADER = struct.Struct('<IBQ')
+MAX_FRAME_BODY = 1 << 20
+
+REQUEST = 1
+RESPONSE = 2
+FILL = 3
+
+Frame = Tuple[int, int, bytes]
+
+
+def encode_frame(kind: int, tag: int, body: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(body), kind, tag) + body
+
+
+class FrameReader:
+    """Reassembles frames from arbitrarily split stream reads."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Frame]:
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        offset = 0
+        header = FRAME_HEADER.size
+        while len(buffer) - offset >= header:
+            length, kind, tag = FRAME_HEADER.unpack_from(buffer, offset)
+            if length > MAX_FRAME_BODY:
+                raise ValueError(f"frame body of {length} bytes exceeds the {MAX_FRAME_BODY} byte limit")
+            end = offset + header + length
+            if end > len(buffer):
+                break
+            frames.append((kind, tag, bytes(buffer[offset + header:end])))
+            offset = end
+        del buffer[:offset]
+        return frames
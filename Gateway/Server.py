@@ -0,0 +1,186 @@
+"""asyncio TCP order gateway in front of an OrderBook.
+
+    python -m Gateway.Server --port 9000 --symbol DEMO --tick-size 0.01
+"""
+import argparse
+import asyncio
+from concurrent.futures import Future
+import logging
+import struct
+from typing import Dict, List, Tuple, Union
+
+from Gateway.Protocol import FILL, REQUEST, RESPONSE, FrameReader, encode_frame
+from Instrument.Instrument import Instrument
+from Order.Order import Order
+from Order.OrderCancel import OrderCancel
+from Order.OrderModify import OrderModify
+from Orderbook.Orderbook import RESTING_ORDER_TYPES, OrderBook
+from Protocol.Codec import Message, Result, decode_message, encode_fill, encode_result
+
+logger = logging.getLogger(__name__)
+
+## encoded RESPONSE frame, plus the cancel outcome or the (bid_id, ask_id, price_ticks, quantity, ...) fill rows
+Reply = Tuple[bytes, Union[bool, List[tuple]]]
+
+
+class _Connection:
+    def __init__(self, writer: asyncio.StreamWriter, max_write_buffer: int):
+        self.writer = writer
+        self.peer = writer.get_extra_info("peername")
+        self.open_orders: Dict[int, int] = {} ## order id -> quantity still resting
+        self.closed = False
+        self._max_write_buffer = max_write_buffer
+
+    def send(self, data: bytes):
+        if self.closed:
+            return
+        self.writer.write(data)
+        if self.writer.transport.get_write_buffer_size() > self._max_write_buffer:
+            logger.warning(f"Dropping slow client {self.peer}: more than {self._max_write_buffer} bytes unsent")
+            self.closed = True
+            self.writer.transport.abort()
+
+
+class GatewayServer:
+    """Accepts pipelined binary commands from many clients and streams acks and fills back.
+
+    Every chunk read from a socket is decoded and handed to the book as one
+    batch through ``submit_batch``, so with a sequenced or threaded book the
+    matching runs on the book's own thread and the event loop only does I/O.
+    Responses are written when the batch completes; fills for resting orders
+    are pushed to whichever connection entered them.
+    """
+
+    def __init__(self, book: OrderBook, max_write_buffer: int = 8 << 20):
+        self._book = book
+        self._max_write_buffer = max_write_buffer
+        self._owners: Dict[int, _Connection] = {}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 9000) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self._handle, host, port)
+        logger.info(f"Gateway listening on {', '.join(str(s.getsockname()) for s in server.sockets)}")
+        return server
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        connection = _Connection(writer, self._max_write_buffer)
+        frames = FrameReader()
+        logger.info(f"Client {connection.peer} connected")
+        try:
+            while not connection.closed:
+                data = await reader.read(1 << 16)
+                if not data:
+                    break
+                tags: List[int] = []
+                messages: List[Message] = []
+                for kind, tag, body in frames.feed(data):
+                    if kind != REQUEST:
+                        raise ValueError(f"unexpected frame kind {kind} from client")
+                    message, _ = decode_message(body)
+                    tags.append(tag)
+                    messages.append(message)
+                if messages:
+                    self._submit(loop, connection, tags, messages)
+        except (ConnectionError, ValueError, LookupError, struct.error) as e:
+            logger.warning(f"Closing client {connection.peer}: {e}")
+        finally:
+            connection.closed = True
+            for order_id in connection.open_orders:
+                if self._owners.get(order_id) is connection:
+                    del self._owners[order_id]
+            writer.close()
+            logger.info(f"Client {connection.peer} disconnected")
+
+    def _submit(self, loop: asyncio.AbstractEventLoop, connection: _Connection, tags: List[int], messages: List[Message]):
+        pending = self._book.submit_batch(messages)
+        if not isinstance(pending, Future):
+            self._respond(connection, messages, self._replies(tags, pending))
+            return
+
+        def done(future: Future):
+            if future.exception() is not None:
+                logger.error(f"Batch from {connection.peer} failed: {future.exception()}")
+                loop.call_soon_threadsafe(connection.writer.transport.abort)
+                return
+            loop.call_soon_threadsafe(self._respond, connection, messages, self._replies(tags, future.result()))
+        pending.add_done_callback(done)
+
+    @staticmethod
+    def _replies(tags: List[int], results: List[Result]) -> List[Reply]:
+        """Encodes a batch's results where it completed, before the book's trade ring can move on."""
+        return [(encode_frame(RESPONSE, tag, encode_result(result)), result if isinstance(result, bool) else list(result.rows()))
+                for tag, result in zip(tags, results)]
+
+    def _respond(self, connection: _Connection, messages: List[Message], replies: List[Reply]):
+        out = []
+        for message, (response, result) in zip(messages, replies):
+            out.append(response)
+            if isinstance(message, OrderCancel):
+                if result:
+                    self._forget(message.order_id)
+                continue
+
+            for fill in result:
+                for order_id in fill[:2]:
+                    if order_id != message.order_id:
+                        self._on_resting_fill(order_id, fill)
+
+            if isinstance(message, Order):
+                ## the book only sequences orders it accepted, so a rejected order never becomes a phantom open order
+                if message.sequence is not None and message.remaining_quantity and message.order_type in RESTING_ORDER_TYPES \
+                        and message.order_id not in self._owners:
+                    self._owners[message.order_id] = connection
+                    connection.open_orders[message.order_id] = message.remaining_quantity
+            elif isinstance(message, OrderModify) and message.remaining is not None \
+                    and self._owners.get(message.order_id) is connection:
+                ## the book only sets remaining on a modify it applied, a rejected one leaves the order as it was
+                if message.remaining:
+                    connection.open_orders[message.order_id] = message.remaining
+                else:
+                    self._forget(message.order_id)
+        connection.send(b"".join(out))
+
+    def _on_resting_fill(self, order_id: int, fill: tuple):
+        owner = self._owners.get(order_id)
+        if owner is None:
+            return
+        bid_id, ask_id, price_ticks, quantity = fill[:4]
+        owner.send(encode_frame(FILL, order_id, encode_fill(bid_id, ask_id, price_ticks, quantity)))
+        remaining = owner.open_orders.get(order_id, 0) - quantity
+        if remaining > 0:
+            owner.open_orders[order_id] = remaining
+        else:
+            self._forget(order_id)
+
+    def _forget(self, order_id: int):
+        owner = self._owners.pop(order_id, None)
+        if owner is not None:
+            owner.open_orders.pop(order_id, None)
+
+
+async def serve(host: str, port: int, instrument: Instrument):
+    book = OrderBook(instrument=instrument, sequenced=True)
+    server = await GatewayServer(book).start(host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        book.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--symbol", default="DEMO")
+    parser.add_argument("--tick-size", type=float, default=0.01)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, Instrument(args.symbol, args.tick_size)))
+    except KeyboardInterrupt:
+        print("Shutting Down...")
+
+
+if __name__ == "__main__":
+    main()
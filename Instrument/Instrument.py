@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+
+@dataclass
+class Instrument:
+    _symbol: str
+    _tick_size: float = 0.01
+
+    def __post_init__(self):
+        if not isinstance(self._tick_size, (float, int)) or self._tick_size <= 0:
+            raise ValueError("tick_size must be a positive int or float")
+        ## number of decimals needed to print a price on this tick grid without float noise
+        self._decimals = max(0, -Decimal(str(self._tick_size)).normalize().as_tuple().exponent)
+
+    @property
+    def symbol(self) -> str:
+        return self._symbol
+
+    @property
+    def tick_size(self) -> float:
+        return self._tick_size
+
+    def to_ticks(self, price: float) -> int:
+        """Converts an API price into an integer number of ticks.
+
+        Raises ValueError when the price is not on this instrument's tick grid.
+        """
+        if not isinstance(price, (float, int)):
+            raise ValueError("price must be either an int or a float")
+        ticks = round(price / self._tick_size)
+        if abs(ticks * self._tick_size - price) > self._tick_size * 1e-6:
+            raise ValueError(f"price {price} is not a multiple of tick size {self._tick_size} for {self._symbol}")
+        return ticks
+
+    def to_price(self, ticks: int) -> float:
+        return round(ticks * self._tick_size, self._decimals)
+
+    def __str__(self):
+        return f"{self._symbol} (tick {self._tick_size})"
@@ -0,0 +1,99 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from Level.DepthIndex import DepthIndex
+from Level.Level import LevelData
+from Level.LevelQueue import LevelQueue
+from Order.OrderEnums import OrderSide
+from Order.OrderStore import OrderStore
+
+
+class BookSide:
+    """Price levels for one side of the book, kept in priority order.
+
+    Level queues live in a dict keyed by price and the prices themselves are
+    mirrored in ``_keys``, a sorted list of sort keys laid out so that the best
+    price is always the *last* element (bids use the price, asks its negation).
+    Peeking at or dropping the best level is therefore O(1), and adding or
+    removing any other level is a binary search plus a C-level memmove.
+    ``depth_index`` mirrors the level quantities for cumulative depth queries.
+    """
+
+    def __init__(self, side: OrderSide, store: OrderStore):
+        self._side = side
+        self._store = store
+        self._sign = 1 if side == OrderSide.BUY else -1
+        self._levels: Dict[int, LevelQueue] = {}
+        self._keys: List[int] = []
+        self.depth_index = DepthIndex(side)
+
+    @property
+    def side(self) -> OrderSide:
+        return self._side
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def __bool__(self) -> bool:
+        return bool(self._levels)
+
+    def __contains__(self, price: int) -> bool:
+        return price in self._levels
+
+    def __getitem__(self, price: int) -> LevelQueue:
+        return self._levels[price]
+
+    def __iter__(self) -> Iterator[int]:
+        return self.prices()
+
+    def get(self, price: int, default=None):
+        return self._levels.get(price, default)
+
+    def get_or_create(self, price: int) -> LevelQueue:
+        level = self._levels.get(price)
+        if level is None:
+            level = LevelQueue(self._store, price)
+            self._levels[price] = level
+            insort(self._keys, self._sign * price)
+        return level
+
+    def pop(self, price: int, default=None):
+        level = self._levels.pop(price, None)
+        if level is None:
+            return default
+        key = self._sign * price
+        if self._keys[-1] == key:
+            self._keys.pop()
+        else:
+            del self._keys[bisect_left(self._keys, key)]
+        return level
+
+    def best_price(self) -> Optional[int]:
+        if not self._keys:
+            return None
+        return self._sign * self._keys[-1]
+
+    def best_level(self) -> Optional[LevelQueue]:
+        if not self._keys:
+            return None
+        return self._levels[self._sign * self._keys[-1]]
+
+    def depth(self, n: int) -> List[LevelData]:
+        """Returns the aggregates of the ``n`` best levels, best first, in O(n)."""
+        sign, levels = self._sign, self._levels
+        return [levels[sign * key].data for key in self._keys[:-n - 1:-1]] if n > 0 else []
+
+    def prices(self) -> Iterator[int]:
+        """Yields prices from best to worst."""
+        sign = self._sign
+        for key in reversed(self._keys):
+            yield sign * key
+
+    def items(self) -> Iterator[Tuple[int, LevelQueue]]:
+        """Yields ``(price, level)`` pairs from best to worst."""
+        levels = self._levels
+        for price in self.prices():
+            yield price, levels[price]
+
+    def __repr__(self):
+        return f"BookSide(side={self._side.name}, levels={len(self._levels)})"
@@ -0,0 +1,186 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional
+
+from Order.OrderEnums import OrderSide
+
+_INITIAL_SIZE = 1024
+## widest window in ticks; prices further out than this from the rest of the book are kept as outliers instead
+_MAX_SIZE = 1 << 16
+## outliers tolerated before the window is placed again
+_OUTLIER_LIMIT = 64
+
+
+class DepthIndex:
+    """Cumulative resting quantity for one side of the book, indexed by tick.
+
+    A Fenwick tree over a window of integer ticks. Positions are laid out from
+    the best price outwards (ascending ticks for asks, descending for bids), so
+    a prefix sum is the quantity available from the top of book through a given
+    price, and the inverse search is the price needed to fill a given quantity.
+    Both are O(log n) in the width of the window.
+
+    The window is a power of two wide, at most ``_MAX_SIZE`` ticks, and is
+    placed over the densest ``_MAX_SIZE // 2`` ticks of live prices. Prices
+    outside it, such as a fat-fingered limit on either side of the book, are
+    kept in sorted lists of outliers that queries walk before or after the
+    window, so a stray price never drags the window away from the book. A new
+    price just outside the window rebuilds it straight away; far ones are left
+    as outliers until there are more than ``_OUTLIER_LIMIT`` of them, or twice
+    as many as the last rebuild left, at which point the window is placed again
+    around where the prices are now. A rebuild costs one tree update per live
+    price, not a pass over every tick.
+    """
+
+    def __init__(self, side: OrderSide):
+        self._sign = -1 if side == OrderSide.BUY else 1
+        self._origin: Optional[int] = None ## key at position 0
+        self._size = 0
+        self._tree = array('q')
+        self._quantities: Dict[int, int] = {} ## key -> quantity for every live price, used to rebuild on resize
+        self._total = 0
+        self._below: List[int] = [] ## sorted keys before the start of the window
+        self._below_total = 0
+        self._beyond: List[int] = [] ## sorted keys past the end of the window
+        self._beyond_total = 0
+        self._outlier_limit = _OUTLIER_LIMIT
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def outliers(self) -> int:
+        """Live prices kept outside the window."""
+        return len(self._below) + len(self._beyond)
+
+    def add(self, price: int, delta: int):
+        """Adds ``delta`` (which may be negative) to the quantity resting at ``price``."""
+        key = self._sign * price
+        quantities = self._quantities
+        quantity = quantities.get(key, 0) + delta
+        if quantity:
+            quantities[key] = quantity
+        else:
+            quantities.pop(key, None)
+        self._total += delta
+        if self._origin is None:
+            self._resize()
+            return
+        pos = key - self._origin
+        size = self._size
+        if 0 <= pos < size:
+            tree = self._tree
+            i = pos + 1
+            while i <= size:
+                tree[i] += delta
+                i += i & -i
+            return
+        if quantity == delta and (-(_MAX_SIZE // 2) < pos < 0 or (pos < _MAX_SIZE // 2 and size < _MAX_SIZE)):
+            ## a new price close to the window: take it in now
+            self._resize()
+            return
+        if pos < 0:
+            outliers = self._below
+            self._below_total += delta
+        else:
+            outliers = self._beyond
+            self._beyond_total += delta
+        if not quantity:
+            del outliers[bisect_left(outliers, key)]
+        elif quantity == delta:
+            insort(outliers, key)
+            if len(self._below) + len(self._beyond) > self._outlier_limit:
+                self._resize()
+
+    def quantity_through(self, price: int) -> int:
+        """Quantity resting at prices at or better than ``price``."""
+        if self._origin is None:
+            return 0
+        key = self._sign * price
+        pos = key - self._origin
+        if pos < 0:
+            below = self._below
+            return sum(self._quantities[k] for k in below[:bisect_right(below, key)])
+        if pos >= self._size:
+            beyond = self._beyond
+            return self._total - self._beyond_total + sum(self._quantities[k] for k in beyond[:bisect_right(beyond, key)])
+        tree = self._tree
+        total = self._below_total
+        i = pos + 1
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def price_for(self, quantity: int) -> Optional[int]:
+        """Worst price that has to be reached to fill ``quantity``, or None if the side is too thin."""
+        if quantity <= 0 or quantity > self._total:
+            return None
+        if quantity <= self._below_total:
+            for key in self._below:
+                quantity -= self._quantities[key]
+                if quantity <= 0:
+                    return self._sign * key
+        quantity -= self._below_total
+        in_window = self._total - self._below_total - self._beyond_total
+        if quantity > in_window:
+            quantity -= in_window
+            for key in self._beyond:
+                quantity -= self._quantities[key]
+                if quantity <= 0:
+                    return self._sign * key
+        tree, size = self._tree, self._size
+        pos = 0
+        step = 1 << (size.bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt <= size and tree[nxt] < quantity:
+                pos = nxt
+                quantity -= tree[nxt]
+            step >>= 1
+        return self._sign * (pos + self._origin)
+
+    def _resize(self):
+        quantities = self._quantities
+        keys = sorted(quantities)
+        if not keys:
+            self._origin = None
+            self._size = 0
+            self._tree = array('q')
+            self._below, self._beyond = [], []
+            self._below_total = self._beyond_total = 0
+            self._outlier_limit = _OUTLIER_LIMIT
+            return
+        ## the run of keys within half the widest window of each other that holds the most prices, best first on a tie
+        reach = _MAX_SIZE // 2
+        first = count = 0
+        end = 0
+        for start, key in enumerate(keys):
+            while end < len(keys) and keys[end] - key < reach:
+                end += 1
+            if end - start > count:
+                first, count = start, end - start
+        low, high = keys[first], keys[first + count - 1]
+        span = high - low + 1
+        size = _INITIAL_SIZE
+        while size < 2 * span and size < _MAX_SIZE:
+            size <<= 1
+
+        origin = self._origin = low - (size - span) // 4
+        self._size = size
+        self._tree = tree = array('q', bytes(8 * (size + 1)))
+        inside, outside = bisect_left(keys, origin), bisect_left(keys, origin + size)
+        self._below, self._beyond = keys[:inside], keys[outside:]
+        self._below_total = sum(quantities[k] for k in self._below)
+        self._beyond_total = sum(quantities[k] for k in self._beyond)
+        self._outlier_limit = max(_OUTLIER_LIMIT, 2 * (len(self._below) + len(self._beyond)))
+        for k in keys[inside:outside]:
+            value = quantities[k]
+            i = k - origin + 1
+            while i <= size:
+                tree[i] += value
+                i += i & -i
+
+    def __repr__(self):
+        return f"DepthIndex(total={self._total}, window={self._size}, outliers={self.outliers})"
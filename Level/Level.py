@@ -2,21 +2,32 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Deque, List
 
+from Instrument.Instrument import Instrument
 from Order.Order import Order
 
 @dataclass
 class LevelInfo:
-    _price: float
+    _price_ticks: int
     _quantity: int
+    _instrument: Instrument = field(repr=False)
+    _count: int = 0
     
     @property
     def price(self):
-        return self._price
+        return self._instrument.to_price(self._price_ticks)
+    
+    @property
+    def price_ticks(self):
+        return self._price_ticks
 
     @property
     def quantity(self):
         return self._quantity
     
+    @property
+    def count(self):
+        return self._count
+    
     @price.setter
     def price(self, price: float):
         if not isinstance(price, (float, int)):
@@ -24,7 +35,7 @@ class LevelInfo:
         
         if price < 0:
             raise ValueError("price must be positive")
-        self._price = float(price)
+        self._price_ticks = self._instrument.to_ticks(price)
 
     @quantity.setter
     def quantity(self, quantity: int):
@@ -45,7 +56,7 @@ class LevelInfo:
         return f"{self.quantity} @ {self.price}"
     
     def __repr__(self):
-        return f"LevelInfo({repr(self.price)}, {repr(self.quantity)})"
+        return f"LevelInfo({repr(self.price)}, {repr(self.quantity)}, count={repr(self.count)})"
 
 @dataclass
 class LevelInfos:
@@ -89,10 +100,11 @@ class LevelAction(Enum):
     
 @dataclass
 class LevelData:
-    price: float
-    quantity: int
+    price: int ## in ticks
+    quantity: int = 0
+    count: int = 0
     
-    def update(self, qty: float, action: LevelAction):
+    def update(self, qty: int, action: LevelAction):
         if action == LevelAction.ADD:
             self.quantity += qty
             self.count += 1
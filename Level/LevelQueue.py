@@ -0,0 +1,83 @@
+from typing import Iterator
+
+from Level.Level import LevelData
+from Order.OrderStore import NIL, OrderStore
+
+
+class LevelQueue:
+    """FIFO of the orders resting at one price level.
+
+    The queue is a doubly-linked list threaded through the ``prev``/``next``
+    columns of the book's OrderStore, so it only keeps the head and tail
+    handles itself. Any order can be unlinked in O(1) given its handle.
+    ``data`` carries the level's L2 aggregates, which the book keeps up to
+    date on every add, fill and cancel.
+    """
+    __slots__ = ("_store", "head", "tail", "_size", "data")
+
+    def __init__(self, store: OrderStore, price: int):
+        self._store = store
+        self.head = NIL
+        self.tail = NIL
+        self._size = 0
+        self.data = LevelData(price)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self.head != NIL
+
+    def __iter__(self) -> Iterator[int]:
+        """Yields order handles in time priority."""
+        nxt = self._store.next
+        handle = self.head
+        while handle != NIL:
+            yield handle
+            handle = nxt[handle]
+
+    def front(self) -> int:
+        if self.head == NIL:
+            raise IndexError("front from an empty LevelQueue")
+        return self.head
+
+    def append(self, handle: int):
+        store = self._store
+        tail = self.tail
+        store.prev[handle] = tail
+        store.next[handle] = NIL
+        if tail == NIL:
+            self.head = handle
+        else:
+            store.next[tail] = handle
+        self.tail = handle
+        self._size += 1
+
+    def remove(self, handle: int):
+        store = self._store
+        prev, nxt = store.prev[handle], store.next[handle]
+        if prev == NIL:
+            self.head = nxt
+        else:
+            store.next[prev] = nxt
+        if nxt == NIL:
+            self.tail = prev
+        else:
+            store.prev[nxt] = prev
+        self._size -= 1
+
+    def adopt(self, head: int, tail: int, size: int):
+        """Takes over a run of ``size`` handles already linked from ``head`` to ``tail`` in the store."""
+        self.head = head
+        self.tail = tail
+        self._size = size
+
+    def popleft(self) -> int:
+        handle = self.head
+        if handle == NIL:
+            raise IndexError("popleft from an empty LevelQueue")
+        self.remove(handle)
+        return handle
+
+    def __repr__(self):
+        return f"LevelQueue(len={self._size})"
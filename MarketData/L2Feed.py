@@ -0,0 +1,214 @@
+from collections import deque
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from Instrument.Instrument import Instrument
+from Order.OrderEnums import OrderSide
+
+## (sequence, side, price_ticks, quantity, count) as recorded on the matching path
+Event = Tuple[int, OrderSide, int, int, int]
+
+
+@dataclass(frozen=True)
+class LevelUpdate:
+    """New state of one price level; a quantity and count of zero mean the level is gone."""
+    _sequence: int
+    _side: OrderSide
+    _price_ticks: int
+    _quantity: int
+    _count: int
+    _instrument: Instrument = field(repr=False)
+
+    @property
+    def sequence(self) -> int:
+        return self._sequence
+
+    @property
+    def side(self) -> OrderSide:
+        return self._side
+
+    @property
+    def price(self) -> float:
+        return self._instrument.to_price(self._price_ticks)
+
+    @property
+    def price_ticks(self) -> int:
+        return self._price_ticks
+
+    @property
+    def quantity(self) -> int:
+        return self._quantity
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def __repr__(self):
+        return f"LevelUpdate(#{self._sequence} {self._side.name} {self._quantity} @ {self.price}, count={self._count})"
+
+
+class L2Subscription:
+    """One consumer's view of the feed, pulled with ``get``.
+
+    Without conflation every update is delivered in sequence order. With a
+    conflation interval, updates to the same level overwrite each other until
+    they are taken, and ``get`` hands out at most one batch per interval, so a
+    slow consumer only ever holds one pending update per level.
+
+    The first batch is the state of the book when the subscription was made;
+    updates follow from there without gaps or overlap.
+    """
+
+    def __init__(self, feed: "L2Feed", conflation: Optional[float], start_sequence: int, seed: Iterable[Event]):
+        self._feed = feed
+        self._conflation = conflation
+        self._start_sequence = start_sequence
+        self._pending: Union[Deque[Event], Dict[Tuple[OrderSide, int], Event]] = deque() if conflation is None else {}
+        self._last_delivery = 0.0
+        self._closed = False
+        self._ready = threading.Condition()
+        self._enqueue(seed)
+
+    @property
+    def conflation(self) -> Optional[float]:
+        return self._conflation
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def get(self, timeout: Optional[float] = None) -> List[LevelUpdate]:
+        """Waits up to ``timeout`` for the next batch of updates; returns an empty list on timeout or close."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._ready:
+            while True:
+                now = time.monotonic()
+                wait = None if deadline is None else deadline - now
+                if self._pending:
+                    due = 0.0 if self._conflation is None else self._last_delivery + self._conflation - now
+                    if due <= 0:
+                        return self._take(now)
+                    wait = due if wait is None else min(wait, due)
+                elif self._closed:
+                    return []
+                if wait is not None and wait <= 0:
+                    return []
+                self._ready.wait(wait)
+
+    def close(self):
+        self._feed.unsubscribe(self)
+        with self._ready:
+            self._closed = True
+            self._ready.notify_all()
+
+    def _take(self, now: float) -> List[LevelUpdate]:
+        if self._conflation is None:
+            events = list(self._pending)
+            self._pending.clear()
+        else:
+            events = sorted(self._pending.values(), key=lambda event: event[0])
+            self._pending = {}
+        self._last_delivery = now
+        instrument = self._feed.instrument
+        return [LevelUpdate(sequence, side, price, quantity, count, instrument)
+                for sequence, side, price, quantity, count in events]
+
+    def _deliver(self, events: List[Event]):
+        """Called by the dispatcher; drops anything already covered by the seed."""
+        if events[0][0] <= self._start_sequence:
+            events = [event for event in events if event[0] > self._start_sequence]
+        if events:
+            with self._ready:
+                self._enqueue(events)
+                self._ready.notify_all()
+
+    def _enqueue(self, events: Iterable[Event]):
+        if self._conflation is None:
+            self._pending.extend(events)
+        else:
+            pending = self._pending
+            for event in events:
+                pending[(event[1], event[2])] = event
+
+    def __repr__(self):
+        return f"L2Subscription(conflation={self._conflation}, pending={len(self._pending)})"
+
+
+class L2Feed:
+    """Fans per-level changes out from the matching path to L2 subscribers.
+
+    ``publish`` is called by the book, under its lock, each time a level's
+    aggregates change, and does no more than stamp a sequence number and
+    append a tuple to a queue. A dispatcher thread drains that queue and
+    hands the events to every subscription, so the matching path never waits
+    on a consumer.
+    """
+
+    def __init__(self, instrument: Instrument):
+        self._instrument = instrument
+        self._sequence = 0
+        self._events: Deque[Event] = deque()
+        self._subscriptions: List[L2Subscription] = [] ## replaced, never mutated, so the dispatcher can iterate it unlocked
+        self._subscriptions_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = True
+        self._dispatcher = threading.Thread(target=self._dispatch, name="l2-feed-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    @property
+    def instrument(self) -> Instrument:
+        return self._instrument
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the last published update."""
+        return self._sequence
+
+    def publish(self, side: OrderSide, price_ticks: int, quantity: int, count: int):
+        self._sequence += 1
+        self._events.append((self._sequence, side, price_ticks, quantity, count))
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def subscribe(self, conflation: Optional[float] = None, levels: Iterable[Tuple[OrderSide, int, int, int]] = ()) -> L2Subscription:
+        """Adds a subscription seeded with ``levels`` as of the current sequence number.
+
+        Must be called while publishing is held off (the book calls it under its
+        lock) so the seed and the updates after it line up.
+        """
+        if conflation is not None and conflation <= 0:
+            raise ValueError("conflation must be a positive number of seconds")
+        seed = [(self._sequence, side, price, quantity, count) for side, price, quantity, count in levels]
+        subscription = L2Subscription(self, conflation, self._sequence, seed)
+        with self._subscriptions_lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: L2Subscription):
+        with self._subscriptions_lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def _dispatch(self):
+        events = self._events
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            batch = []
+            while events:
+                batch.append(events.popleft())
+            if batch:
+                for subscription in self._subscriptions:
+                    subscription._deliver(batch)
+            ## close() may have cleared its wakeup along with a batch's; check again rather than wait for another
+            if not self._running and not events:
+                return
+
+    def close(self):
+        """Delivers everything already published, then closes every subscription."""
+        self._running = False
+        self._wakeup.set()
+        self._dispatcher.join()
+        for subscription in self._subscriptions:
+            subscription.close()
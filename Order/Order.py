@@ -1,19 +1,25 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
 from Order.OrderEnums import OrderType, OrderSide
 from datetime import datetime, timezone
+import time
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     _order_type: OrderType
     _order_id: int
     _side: OrderSide
     _price: float
     _initial_quantity: int
-    
+    _expiry_ns: Optional[int] = None ## when a GoodTillDate order leaves the book; GoodForDay orders get the session close
+    _remaining_quantity: int = field(init=False)
+    _timestamp_ns: int = field(init=False) ## nanoseconds since the epoch, turned into a datetime only on request
+    _price_ticks: Optional[int] = field(init=False, default=None) ## set by the OrderBook from its instrument's tick size
+    _sequence: Optional[int] = field(init=False, default=None) ## arrival number assigned by the OrderBook, decides time priority
 
     def __post_init__(self):
         self._remaining_quantity = self._initial_quantity
-        self._timestamp = datetime.now(timezone.utc)
+        self._timestamp_ns = time.time_ns()
         
     @property
     def order_type(self):
@@ -32,17 +38,29 @@ class Order:
         return self._price
     
     @property
-    def timestamp(self):
-        return self._timestamp
+    def price_ticks(self):
+        return self._price_ticks
+    
+    @property
+    def sequence(self) -> Optional[int]:
+        return self._sequence
+    
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self._timestamp_ns / 1e9, tz=timezone.utc)
+    
+    @property
+    def timestamp_ns(self) -> int:
+        return self._timestamp_ns
+
+    @property
+    def expiry_ns(self) -> Optional[int]:
+        return self._expiry_ns
 
     @property
     def initial_quantity(self):
         return self._initial_quantity
     
-    @property
-    def filled_quantity(self):
-        return self.initial_quantity() - self.remaining_quantity()
-    
     @property
     def remaining_quantity(self):
         return self._remaining_quantity
@@ -74,6 +92,32 @@ class Order:
             raise ValueError("price must be positive")
         self._price = float(price)
 
+    @price_ticks.setter
+    def price_ticks(self, price_ticks: int):
+        if not isinstance(price_ticks, int):
+            raise ValueError("price_ticks must be an instance of int")
+        self._price_ticks = price_ticks
+
+    @sequence.setter
+    def sequence(self, sequence: int):
+        if not isinstance(sequence, int):
+            raise ValueError("sequence must be an instance of int")
+        if sequence < 0:
+            raise ValueError("sequence must be positive")
+        self._sequence = sequence
+
+    @timestamp_ns.setter
+    def timestamp_ns(self, timestamp_ns: int):
+        if not isinstance(timestamp_ns, int):
+            raise ValueError("timestamp_ns must be an instance of int")
+        self._timestamp_ns = timestamp_ns
+
+    @expiry_ns.setter
+    def expiry_ns(self, expiry_ns: Optional[int]):
+        if expiry_ns is not None and not isinstance(expiry_ns, int):
+            raise ValueError("expiry_ns must be an instance of int or None")
+        self._expiry_ns = expiry_ns
+
     @initial_quantity.setter
     def initial_quantity(self, initial_quantity: int):
         if not isinstance(initial_quantity, int):
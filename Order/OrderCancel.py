@@ -0,0 +1,19 @@
+
+from dataclasses import dataclass
+
+@dataclass
+class OrderCancel:
+    _order_id: int
+
+    @property
+    def order_id(self):
+        return self._order_id
+
+    @order_id.setter
+    def order_id(self, id: int):
+        if not isinstance(id, int):
+            raise ValueError("id must be an instance of int")
+        self._order_id = id
+
+    def __repr__(self):
+        return f"OrderCancel(_order_id={self.order_id})"
@@ -8,5 +8,6 @@ class OrderType(Enum):
     GoodTillCancel = "goodTillCancel"
     FillAndKill = "fillAndKill"
     FillOrKill = "fillOrKill"
-    GoodForDay = "goodForDay",
-    Market = "market"
\ No newline at end of file
+    GoodForDay = "goodForDay"
+    Market = "market"
+    GoodTillDate = "goodTillDate"
@@ -9,6 +9,10 @@ class OrderModify:
     _price: float
     _quantity: int
     
+    def __post_init__(self):
+        self._price_ticks = None ## set by the OrderBook from its instrument's tick size
+        self._remaining = None ## open quantity the OrderBook left resting once it applied the modify; None if it rejected it
+    
     @property
     def order_id(self):
         return self._order_id
@@ -21,9 +25,17 @@ class OrderModify:
     def price(self):
         return self._price
 
+    @property
+    def price_ticks(self):
+        return self._price_ticks
+
     @property
     def quantity(self):
         return self._quantity
+
+    @property
+    def remaining(self):
+        return self._remaining
     
     @order_id.setter
     def order_id(self, id: int):
@@ -46,6 +58,18 @@ class OrderModify:
             raise ValueError("price must be positive")
         self._price = float(price)
 
+    @price_ticks.setter
+    def price_ticks(self, price_ticks: int):
+        if not isinstance(price_ticks, int):
+            raise ValueError("price_ticks must be an instance of int")
+        self._price_ticks = price_ticks
+
+    @remaining.setter
+    def remaining(self, remaining: int):
+        if not isinstance(remaining, int):
+            raise ValueError("remaining must be an instance of int")
+        self._remaining = remaining
+
     @quantity.setter
     def quantity(self, quantity: int):
         if not isinstance(quantity, int):
@@ -56,6 +80,6 @@ class OrderModify:
         
     def __repr__(self):
         return (
-            f"OrderModify(_order_id={self.order_id}, _side={self.side}, _type={self.order_type}, "
-            f"_price={self.price}, _quantity={self.filled_quantity})"
+            f"OrderModify(_order_id={self.order_id}, _side={self.side}, "
+            f"_price={self.price}, _quantity={self.quantity})"
         )
\ No newline at end of file
@@ -0,0 +1,116 @@
+from array import array
+from typing import Dict, List
+
+from Instrument.Instrument import Instrument
+from Order.Order import Order
+from Order.OrderEnums import OrderSide, OrderType
+
+NIL = -1 ## handle value meaning "no order", used for empty links
+
+## enums are stored as small integer codes in the columns
+SIDES = (OrderSide.BUY, OrderSide.SELL)
+SIDE_CODES: Dict[OrderSide, int] = {side: code for code, side in enumerate(SIDES)}
+ORDER_TYPES = tuple(OrderType)
+ORDER_TYPE_CODES: Dict[OrderType, int] = {order_type: code for code, order_type in enumerate(ORDER_TYPES)}
+
+
+class OrderStore:
+    """Struct-of-arrays storage for resting orders, addressed by integer handle.
+
+    Every resting order occupies one row across a set of parallel ``array``
+    columns instead of being a Python object of its own. ``prev``/``next`` hold
+    the handles of the neighbouring orders at the same price level, which is
+    what LevelQueue threads its FIFO through. Released rows go onto a free list
+    and are reused by the next allocation, so the columns only grow to the peak
+    number of resting orders.
+    """
+
+    def __init__(self):
+        self.order_ids = array('q')
+        self.sides = array('b')
+        self.order_types = array('b')
+        self.prices = array('q') ## in ticks
+        self.quantities = array('q') ## initial quantity
+        self.remaining = array('q')
+        self.timestamps = array('q') ## nanoseconds since the epoch
+        self.sequences = array('q') ## arrival number, decides time priority
+        self.expiries = array('q') ## nanoseconds since the epoch, 0 for orders that never expire
+        self.prev = array('q')
+        self.next = array('q')
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.order_ids) - len(self._free)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.order_ids)
+
+    def allocate(self, order_id: int, side: int, order_type: int, price: int,
+                 quantity: int, remaining: int, timestamp: int, sequence: int, expiry: int = 0) -> int:
+        if self._free:
+            handle = self._free.pop()
+            self.order_ids[handle] = order_id
+            self.sides[handle] = side
+            self.order_types[handle] = order_type
+            self.prices[handle] = price
+            self.quantities[handle] = quantity
+            self.remaining[handle] = remaining
+            self.timestamps[handle] = timestamp
+            self.sequences[handle] = sequence
+            self.expiries[handle] = expiry
+            self.prev[handle] = NIL
+            self.next[handle] = NIL
+            return handle
+
+        handle = len(self.order_ids)
+        self.order_ids.append(order_id)
+        self.sides.append(side)
+        self.order_types.append(order_type)
+        self.prices.append(price)
+        self.quantities.append(quantity)
+        self.remaining.append(remaining)
+        self.timestamps.append(timestamp)
+        self.sequences.append(sequence)
+        self.expiries.append(expiry)
+        self.prev.append(NIL)
+        self.next.append(NIL)
+        return handle
+
+    def load(self, columns: Dict[str, array]):
+        """Replaces every row with ``columns``, one buffer per column name.
+
+        The rows come back linked into a single chain in row order; the caller
+        cuts it into levels by unlinking at each level boundary.
+        """
+        for name in ("order_ids", "sides", "order_types", "prices", "quantities", "remaining", "timestamps", "sequences",
+                     "expiries"):
+            column = array(getattr(self, name).typecode)
+            column.frombytes(memoryview(columns[name]).cast('B'))
+            setattr(self, name, column)
+        rows = len(self.order_ids)
+        self.prev = array('q', range(-1, rows - 1))
+        self.next = array('q', range(1, rows + 1))
+        self._free = []
+
+    def release(self, handle: int):
+        self._free.append(handle)
+
+    def view(self, handle: int, instrument: Instrument) -> Order:
+        """Builds a detached Order with the current state of the row at ``handle``."""
+        order = Order(
+            _order_type=ORDER_TYPES[self.order_types[handle]],
+            _order_id=self.order_ids[handle],
+            _side=SIDES[self.sides[handle]],
+            _price=instrument.to_price(self.prices[handle]),
+            _initial_quantity=self.quantities[handle]
+        )
+        order.price_ticks = self.prices[handle]
+        order.remaining_quantity = self.remaining[handle]
+        order.timestamp_ns = self.timestamps[handle]
+        order.sequence = self.sequences[handle]
+        order.expiry_ns = self.expiries[handle] or None
+        return order
+
+    def __repr__(self):
+        return f"OrderStore(live={len(self)}, capacity={self.capacity})"
@@ -1,333 +1,1093 @@
-from collections import defaultdict, deque
+from array import array
 from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+import heapq
+from itertools import takewhile
 import threading
-from typing import Dict, List, Deque
+import time
+from typing import Dict, List, Optional, Tuple, Union
+from Auction.Auction import AuctionCommand, AuctionResult, clearing_price
+from Clock.Clock import Clock, WallClock
+from Instrument.Instrument import Instrument
+from Level.BookSide import BookSide
+from Level.LevelQueue import LevelQueue
 from Level.Level import LevelAction, LevelData, LevelInfo, OrderBookLevelInfos
+from MarketData.L2Feed import L2Feed, L2Subscription
 from Order.OrderEnums import OrderType, OrderSide
 from Order.Order import Order
+from Order.OrderCancel import OrderCancel
 from Order.OrderModify import OrderModify
-from Trade.TradeInfo import Trade, TradeInfo
+from Order.OrderStore import NIL, ORDER_TYPE_CODES, ORDER_TYPES, SIDE_CODES, SIDES, OrderStore
+from Orderbook.Sequencer import Sequencer
+from Persistence.Journal import Journal
+from Persistence.Snapshot import Snapshot, write_snapshot
+from Telemetry.AsyncLog import AsyncHotPathLog, HotPathLog
+from Telemetry.Metrics import Metrics, MetricsReporter
+from Trade.TradeBuffer import NO_AGGRESSOR, TradeBuffer, TradeSlice
 import logging
 
 logger = logging.getLogger(__name__)
 
-@dataclass
-class OrderEntry:
-    _order: Order
-    _location: Deque[Order]
-    
-    @property
-    def order(self) -> Order:
-        return self._order
-    
-    @property
-    def location(self) -> deque:
-        return self._location
-    
-    @order.setter
-    def order(self, order: Order):
-        if not isinstance(order, Order):
-            raise ValueError("order must be an instance of Order")
-        self._order = order
-    
-    @location.setter
-    def location(self, location: Deque[Order]):
-        if not isinstance(location, deque):
-            raise ValueError("location must be a deque of Orders")
-        self._location = location
-    
-    def __repr__(self):
-        return f"OrderEntry(order={self.order}, location=deque(len={len(self.location)}))"
-    
+## order types whose unfilled remainder is allowed to rest in the book
+RESTING_ORDER_TYPES = (OrderType.GoodTillCancel, OrderType.GoodForDay, OrderType.GoodTillDate)
+## order types that leave the book on their own: GoodTillDate at the order's expiry, GoodForDay at the session close
+_EXPIRING_ORDER_TYPES = (OrderType.GoodForDay, OrderType.GoodTillDate)
+_MARKET_CLOSE_HOUR = 16 ## local time
+_BUY = SIDE_CODES[OrderSide.BUY]
+_SELL = SIDE_CODES[OrderSide.SELL]
+## row kinds for OrderBook.ingest
+INGEST_ADD = 0
+INGEST_CANCEL = 1
+_INGEST_KINDS = frozenset((INGEST_ADD, INGEST_CANCEL))
+_INGEST_SIDE_CODES = frozenset(SIDE_CODES.values())
+## order types the column path takes: the ones that need neither an expiry nor a float price conversion
+_INGEST_ORDER_TYPE_CODES = frozenset(ORDER_TYPE_CODES[order_type] for order_type in (
+    OrderType.GoodTillCancel, OrderType.FillAndKill, OrderType.FillOrKill, OrderType.Market))
+_GOOD_TILL_CANCEL, _FILL_AND_KILL, _FILL_OR_KILL, _MARKET = (ORDER_TYPE_CODES[order_type] for order_type in (
+    OrderType.GoodTillCancel, OrderType.FillAndKill, OrderType.FillOrKill, OrderType.Market))
+_STORE_COLUMNS = ("order_ids", "sides", "order_types", "prices", "quantities", "remaining", "timestamps", "sequences",
+                  "expiries")
+
 
 class OrderBook:
-    def __init__(self, use_threads: bool = True, max_workers: int = 4):
-        self._bids: Dict[float, deque] = defaultdict(deque) ## example: {101.5: deque([Order1, Order2])}
-        self._asks: Dict[float, deque] = defaultdict(deque)
-        self._orders: Dict[int, OrderEntry] = {}
-        self._level_data: Dict[float, LevelData] = {}
+    def __init__(self, use_threads: bool = True, max_workers: int = 4, instrument: Instrument = None, sequenced: bool = False,
+                 journal_path: Optional[str] = None, journal_fsync: bool = True, snapshot_path: Optional[str] = None,
+                 trade_buffer_size: int = 1 << 16, clock: Optional[Clock] = None, metrics: bool = False,
+                 metrics_interval: Optional[float] = None, async_logging: bool = False):
+        self._instrument: Instrument = instrument or Instrument("DEFAULT")
+        ## arriving commands and fills are stamped from the clock; time priority comes from the order sequence
+        self._clock: Clock = clock or WallClock()
+        self._next_sequence = 0
+        ## resting orders live in the store's columns; the book only holds integer handles into it
+        self._store: OrderStore = OrderStore()
+        ## prices are kept in integer ticks internally, example: {10150: LevelQueue(handle1 <-> handle2)}, best price first
+        self._bids: BookSide = BookSide(OrderSide.BUY, self._store)
+        self._asks: BookSide = BookSide(OrderSide.SELL, self._store)
+        self._orders: Dict[int, int] = {} ## order id -> store handle
+        ## min-heap of (expiry_ns, sequence, order id) for resting orders that expire; entries for orders that have
+        ## since been cancelled, filled or modified are skipped when they come up
+        self._expiries: List[Tuple[int, int, int]] = []
+        self._expiry_wakeup = threading.Event()
+        self._feed: Optional[L2Feed] = None ## created by the first L2 subscription
+        ## fills are recorded as rows of a columnar ring; Trade objects are only built when a caller reads them
+        self._trades: TradeBuffer = TradeBuffer(self._instrument, trade_buffer_size)
+        ## during a call auction orders only collect, crossed or not, until end_auction uncrosses them at one price
+        self._auction = False
         self._mutex = threading.Lock()
         self._use_threads = use_threads
-        self._executor = ThreadPoolExecutor(max_workers=max_workers) if use_threads else None
+        ## per-command log events; in async mode they are queued and formatted off the matching path
+        self._log: HotPathLog = AsyncHotPathLog(logger) if async_logging else HotPathLog(logger)
+        ## latency histograms and counters, only recorded when asked for; a periodic dump implies them
+        self._metrics: Optional[Metrics] = Metrics() if metrics or metrics_interval else None
+        ## every applied command is journaled before it is acknowledged; an existing journal is replayed first,
+        ## starting from where the snapshot (if any) left off
+        self._journal: Optional[Journal] = None
+        journal_position = self.restore(snapshot_path) if snapshot_path else 0
+        if journal_path:
+            self._replay_journal(Journal(journal_path, journal_fsync), journal_position)
+        ## sequenced mode replaces the executor with a single matcher thread fed through a ring buffer
+        self._sequencer: Optional[Sequencer] = Sequencer(self._mutex, before_ack=self._sync_journal,
+                                                         on_batch=self._record_batch if self._metrics else None) if sequenced else None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if use_threads and not sequenced else None
         self._shutdown_flag = threading.Event()
-        self._shutdown_condition = threading.Condition()
-        self._gfd_pruner_thread = threading.Thread(target = self._prune_good_for_day_orders, daemon=True)
-        self._gfd_pruner_thread.start()
+        ## commands expire whatever is due before they apply; with a real clock a timer also expires orders while idle
+        self._expiry_thread: Optional[threading.Thread] = None
+        if self._clock.realtime:
+            self._expiry_thread = threading.Thread(target=self._run_expiry_timer, name="orderbook-expiry", daemon=True)
+            self._expiry_thread.start()
+        self._reporter: Optional[MetricsReporter] = MetricsReporter(self.stats, metrics_interval) if metrics_interval else None
         
         
-    def can_match(self, side: OrderSide, price: float) -> bool: 
+    @property
+    def instrument(self) -> Instrument:
+        return self._instrument
+    
+    @property
+    def clock(self) -> Clock:
+        return self._clock
+        
+    def can_match(self, side: OrderSide, price_ticks: int) -> bool: 
         if side == OrderSide.BUY:
-            if not self._asks:
-                return False
-            best_ask = min(self._asks.keys())
-            return price >= best_ask
+            best_ask = self._asks.best_price()
+            return best_ask is not None and price_ticks >= best_ask
         else:
-            if not self._bids:
-                return False
-            best_bid = max(self._bids.keys())
-            return price >= best_bid
+            best_bid = self._bids.best_price()
+            return best_bid is not None and price_ticks <= best_bid
         
     def determine_aggressor(self, order1: Order, order2: Order):
-        non_aggressor: Order = order1 if order1.timestamp < order2.timestamp else order2
-        aggressor: Order = order1 if order1.timestamp > order2.timestamp else order2
+        """Returns ``(resting, aggressor)``: the order the book sequenced first is the resting one."""
+        non_aggressor: Order = order1 if order1.sequence < order2.sequence else order2
+        aggressor: Order = order2 if non_aggressor is order1 else order1
         return non_aggressor, aggressor
         
-    def match_orders(self) -> List[Trade]:
-        trades: List[Trade] = []
-        logger.info(f"Starting order matching - bids: {len(self._bids)}, asks: {len(self._asks)}")
-        while self._asks and self._bids:
-            best_bid_price: float = max(self._bids.keys())
-            best_ask_price: float = min(self._asks.keys())
-            
-            logger.debug(f"Best bid: {best_bid_price}, best ask: {best_ask_price}")
-            if best_bid_price < best_ask_price:
-                logger.debug("No match: best bid < best ask")
+    def match_orders(self, order: Order) -> TradeSlice:
+        """Matches an incoming order against the opposite side of the book.
+
+        Walks the opposite side from its best level, in one pass, until the
+        order is filled or its limit price no longer crosses; Market orders
+        have no limit. A level the order can take completely is consumed in
+        bulk: every resting order in it is filled and the level is dropped at
+        once. A level that is only partly taken is walked from the front. The
+        level's aggregates, depth index and L2 update are applied once per
+        level either way. The incoming order is always the aggressor and trades
+        at the resting order's price. The caller decides whether any remainder
+        rests. Fills are written to the book's TradeBuffer and returned as a
+        slice of it.
+        """
+        start = self._trades.position
+        remaining = self._match(order.side == OrderSide.BUY, order.order_type == OrderType.Market, order.price_ticks,
+                                order.order_id, order.remaining_quantity, order.timestamp_ns) ## fills happen at the aggressor's arrival time
+        order.fill_order(order.remaining_quantity - remaining)
+        return self._trades.slice(start)
+    
+    def _match(self, is_buy: bool, is_market: bool, limit_price: int, incoming_id: int, remaining: int, timestamp: int) -> int:
+        """The matching loop behind ``match_orders``, on plain fields; returns the quantity left unfilled."""
+        record = self._trades.record
+        aggressor = _BUY if is_buy else _SELL
+        opposite_book: BookSide = self._asks if is_buy else self._bids
+        store = self._store
+        order_ids, resting_remaining, next_handle = store.order_ids, store.remaining, store.next
+        orders = self._orders
+        log = self._log
+        info, debug = log.enabled_for(logging.INFO), log.enabled_for(logging.DEBUG)
+        
+        while remaining > 0 and opposite_book:
+            best_price: int = opposite_book.best_price()
+            if not is_market and ((best_price > limit_price) if is_buy else (best_price < limit_price)):
+                if debug:
+                    log.log(logging.DEBUG, "Order %s no longer crosses: limit %s, best opposite %s", incoming_id, limit_price, best_price)
                 break
             
-            best_bids_queue: deque = self._bids[best_bid_price]
-            best_asks_queue: deque = self._asks[best_ask_price]
+            level: LevelQueue = opposite_book[best_price]
+            level_data: LevelData = level.data
+            if remaining >= level_data.quantity:
+                ## the whole level trades: fill every resting order in it and drop the level in one go
+                handle: int = level.head
+                while handle != NIL:
+                    resting_id: int = order_ids[handle]
+                    quantity = resting_remaining[handle]
+                    if is_buy:
+                        record(incoming_id, resting_id, best_price, quantity, timestamp, aggressor)
+                    else:
+                        record(resting_id, incoming_id, best_price, quantity, timestamp, aggressor)
+                    del orders[resting_id]
+                    store.release(handle)
+                    if debug:
+                        log.log(logging.DEBUG, "Order %s fully filled by %s for %s @ %s ticks", resting_id, incoming_id, quantity, best_price)
+                    handle = next_handle[handle]
+                filled, emptied = level_data.quantity, level_data.count
+                opposite_book.pop(best_price)
+            else:
+                ## only the front of the level trades; orders that fill completely leave the queue
+                filled = emptied = 0
+                while filled < remaining:
+                    handle = level.head
+                    resting_id = order_ids[handle]
+                    quantity = min(remaining - filled, resting_remaining[handle])
+                    resting_remaining[handle] -= quantity
+                    filled += quantity
+                    if is_buy:
+                        record(incoming_id, resting_id, best_price, quantity, timestamp, aggressor)
+                    else:
+                        record(resting_id, incoming_id, best_price, quantity, timestamp, aggressor)
+                    if resting_remaining[handle] == 0:
+                        level.popleft()
+                        del orders[resting_id]
+                        store.release(handle)
+                        emptied += 1
+                    if debug:
+                        log.log(logging.DEBUG, "Order %s filled by %s for %s @ %s ticks", resting_id, incoming_id, quantity, best_price)
             
-            while best_bids_queue and best_asks_queue:
-                bid: Order = best_bids_queue[0]
-                ask: Order = best_asks_queue[0]
-                
-                quantity = min(bid._remaining_quantity, ask._remaining_quantity)
-                
-                bid.fill_order(quantity)
-                ask.fill_order(quantity)
-                
-                non_aggressor, _ = self.determine_aggressor(bid, ask)
-                logger.info(f"Matched {quantity} @ {non_aggressor.price} between BUY {bid.order_id} and SELL {ask.order_id}")
-
-                if bid.is_filled():
-                    best_bids_queue.popleft()
-                    del self._orders[bid.order_id]
-                    logger.debug(f"Order {bid.order_id} fully filled and removed (BUY)")
-
-                if ask.is_filled():
-                    best_asks_queue.popleft()
-                    del self._orders[ask.order_id]
-                    logger.debug(f"Order {ask.order_id} fully filled and removed (SELL)")
-    
-                bid_trade_info: TradeInfo = TradeInfo(bid.order_id, non_aggressor.price, quantity)
-                ask_trade_info: TradeInfo = TradeInfo(ask.order_id, non_aggressor.price, quantity)
-                trade: Trade = Trade(bid_trade_info, ask_trade_info)
-                trades.append(trade)
-                self._on_order_match(bid.price, quantity, bid.is_filled())
-                logger.info(f"Updated ${bid.price} level with {quantity} quantity")
-                self._on_order_match(ask.price, quantity, ask.is_filled())
-                logger.info(f"Updated ${ask.price} level with {quantity} quantity")
-
-            if not best_bids_queue:
-                self._bids.pop(best_bid_price, None)
-                self._level_data.pop(best_bid_price, None)
-                logger.debug(f"Removed empty bid level: {best_bid_price}")
-
-                
-            if not best_asks_queue:
-                self._asks.pop(best_ask_price, None)
-                self._level_data.pop(best_ask_price, None)
-                logger.debug(f"Removed empty ask level: {best_ask_price}")
-
-        if self._bids:
-            _, queue = max(self._bids.items())
-            order: Order = queue[0]
-            if order.order_type == OrderType.FillAndKill:
-                self.cancel_order(order.order_id)
-                logger.info(f"FillAndKill BUY order {order.order_id} could not be matched and was cancelled")
-
-        if self._asks:
-            _, queue = min(self._asks.items())
-            order: Order = queue[0]
-            if order.order_type == OrderType.FillAndKill:
-                self.cancel_order(order.order_id)
-                logger.info(f"FillAndKill SELL order {order.order_id} could not be matched and was cancelled")
+            remaining -= filled
+            self._on_level_matched(opposite_book, level_data, filled, emptied)
+            if info:
+                log.log(logging.INFO, "Matched %s @ %s ticks for order %s, %s resting orders fully filled",
+                        filled, best_price, incoming_id, emptied)
+        return remaining
+    
+    def add_order(self, order: Order) -> TradeSlice: 
+        self._lock()
+        try:
+            trades = self._add_order(order)
+        finally:
+            self._mutex.release()
+        self._sync_journal()
         return trades
     
-    def add_order(self, order: Order) -> List[Trade]: 
-        with self._mutex:
-            if order.order_id in self._orders:
-                logger.warning(f"Duplicate order ID {order.order_id} rejected.")
-                return []
-            
-            if order.order_type == OrderType.FillAndKill and not self.can_match(order.side, order.price):
-                logger.info(f"FillAndKill order {order.order_id} was unable to be matched and was discarded")
-                return []
-            
-            applicable_book = self._bids if order.side == OrderSide.BUY else self._asks
-            
-            if order.order_type == OrderType.FillAndKill and not self.can_match(order.side, order.price):
-                return []
-            
-            if order.order_type == OrderType.FillOrKill and not self.can_fully_filled(order.side, order.price, order.initial_quantity):
-                return []
-            
-            if order.price not in applicable_book:
-                applicable_book[order.price] = deque()
-                
-            applicable_book[order.price].append(order)
-            self._orders[order.order_id] = OrderEntry(order, applicable_book[order.price])
-            
-            self._on_order_added(order)            
-            logger.info(f"Added {order}")
-            return self.match_orders()
     def submit_add_order(self, order: Order):
+        if self._sequencer:
+            return self._sequencer.submit(self._add_order, order)
         if self._executor:
-            return self._executor.submit(self.add_order, order)
+            return self._submit(self.add_order, order)
         return self.add_order(order)
         
     def cancel_order(self, order_id: int) -> bool:
+        self._lock()
+        try:
+            cancelled = self._cancel_order(order_id)
+        finally:
+            self._mutex.release()
+        self._sync_journal()
+        return cancelled
+    
+    def submit_cancel_order(self, order_id: int):
+        if self._sequencer:
+            return self._sequencer.submit(self._cancel_order, order_id)
+        if self._executor:
+            return self._submit(self.cancel_order, order_id)
+        return self.cancel_order(order_id)
+    
+    def order_modify(self, order: OrderModify) -> TradeSlice:
+        self._lock()
+        try:
+            trades = self._order_modify(order)
+        finally:
+            self._mutex.release()
+        self._sync_journal()
+        return trades
+    
+    def submit_order_modify(self, order: OrderModify):
+        if self._sequencer:
+            return self._sequencer.submit(self._order_modify, order)
+        if self._executor:
+            return self._submit(self.order_modify, order)
+        return self.order_modify(order)
+    
+    def apply_batch(self, messages: List[Union[Order, OrderCancel, OrderModify]]) -> List[Union[TradeSlice, bool]]:
+        """Applies a mixed batch of adds, cancels and modifies in order under a single lock acquisition.
+
+        Returns one result per message, in the same order: the trades for an
+        Order or OrderModify, and whether the cancel succeeded for an OrderCancel.
+        """
+        batch = self._prepare_batch(messages)
+        self._lock()
+        try:
+            results = self._run_batch(batch)
+        finally:
+            self._mutex.release()
+        self._sync_journal()
+        return results
+    
+    def ingest(self, kinds, order_ids, sides, order_types, prices, quantities) -> TradeSlice:
+        """Applies a block of adds and cancels given as parallel integer columns, without Order objects.
+
+        Row ``i`` is an add of ``order_ids[i]`` when ``kinds[i]`` is
+        INGEST_ADD and a cancel of it when it is INGEST_CANCEL; for a cancel
+        the other columns are ignored. Sides and order types are the OrderStore
+        codes and prices are already in ticks. Only GoodTillCancel,
+        FillAndKill, FillOrKill and Market orders are accepted; an unknown
+        kind, or side or order type on an add row, raises ValueError before
+        any row is applied. Columns can be
+        any integer sequences, NumPy arrays included. The block is applied in
+        order under one lock acquisition and stamped with a single clock
+        reading. Adds match exactly as ``add_order`` would, but rows it would
+        reject (duplicate ids, non-positive quantities or limit prices) and
+        cancels of orders that are gone are skipped without logging. Nothing is
+        journaled, so a journaled book refuses the call. Returns every fill of
+        the block as one slice.
+        """
+        if self._journal:
+            raise ValueError("ingest bypasses the journal; use add_order or apply_batch on a journaled book")
+        columns = [column.tolist() if hasattr(column, "tolist") else list(column)
+                   for column in (kinds, order_ids, sides, order_types, prices, quantities)]
+        if len({len(column) for column in columns}) > 1:
+            raise ValueError("ingest columns must all have the same length")
+        kinds, sides, order_types = columns[0], columns[2], columns[3]
+        if not _INGEST_KINDS.issuperset(kinds):
+            raise ValueError(f"ingest row kinds must be INGEST_ADD ({INGEST_ADD}) or INGEST_CANCEL ({INGEST_CANCEL})")
+        ## sides and types only mean something on add rows; checked up front so a bad block changes nothing
+        added = {(side, order_type) for kind, side, order_type in zip(kinds, sides, order_types) if kind == INGEST_ADD}
+        if not _INGEST_SIDE_CODES.issuperset(side for side, _ in added):
+            raise ValueError(f"ingest only takes side codes {sorted(_INGEST_SIDE_CODES)} on add rows")
+        if not _INGEST_ORDER_TYPE_CODES.issuperset(order_type for _, order_type in added):
+            raise ValueError(f"ingest only takes order type codes {sorted(_INGEST_ORDER_TYPE_CODES)} on add rows")
+        self._lock()
+        try:
+            trades = self._ingest(*columns)
+        finally:
+            self._mutex.release()
+        return trades
+    
+    def submit_batch(self, messages: List[Union[Order, OrderCancel, OrderModify]]):
+        if self._sequencer:
+            return self._sequencer.submit(self._run_batch, self._prepare_batch(messages))
+        if self._executor:
+            return self._submit(self.apply_batch, messages)
+        return self.apply_batch(messages)
+    
+    @property
+    def in_auction(self) -> bool:
+        return self._auction
+    
+    def begin_auction(self):
+        """Opens a call auction: orders collect in the book without matching until ``end_auction``.
+
+        Only resting order types are accepted while the auction is open;
+        FillAndKill, FillOrKill and Market orders are rejected. Cancels and
+        modifies work as usual, but nothing trades, so the book may cross.
+        """
+        self._lock()
+        try:
+            self._auction_command(True)
+        finally:
+            self._mutex.release()
+        self._sync_journal()
+    
+    def end_auction(self) -> AuctionResult:
+        """Uncrosses the book at a single clearing price and returns to continuous matching.
+
+        The clearing price is the one that maximises executed volume (see
+        ``Auction.clearing_price``). That volume is taken off each side in
+        price-time priority and paired buyer to seller at the clearing price,
+        with no aggressor; what is left does not cross. The fills are in the
+        trade ring, so ``trade_buffer_size`` has to hold the whole uncross for
+        the returned slice to stay readable.
+        """
+        self._lock()
+        try:
+            result = self._auction_command(False)
+        finally:
+            self._mutex.release()
+        self._sync_journal()
+        return result
+    
+    def indicative_uncross(self) -> AuctionResult:
+        """Price, volume and imbalance the book would uncross at right now, without trading anything."""
         with self._mutex:
-            order_entry: OrderEntry = self._orders.get(order_id, None)
-            if not order_entry:
-                logger.warning(f"Cancel failed: Order ID: {order_id} not found.")
+            price_ticks, volume, imbalance = self._clearing_price()
+            return AuctionResult(price_ticks, volume, imbalance, self._trades.empty(), self._instrument)
+    
+    def _lock(self):
+        """Acquires the book mutex, timing the wait when metrics are on."""
+        if self._metrics is None:
+            self._mutex.acquire()
+            return
+        start = time.perf_counter_ns()
+        self._mutex.acquire()
+        self._metrics.lock_wait.record(time.perf_counter_ns() - start)
+    
+    def _submit(self, handler, argument):
+        if self._metrics:
+            ## ThreadPoolExecutor keeps its backlog in an unbounded SimpleQueue; sample how deep it is on the way in
+            self._metrics.queue_depth.record(self._executor._work_queue.qsize())
+        return self._executor.submit(handler, argument)
+    
+    def _record_batch(self, size: int, lock_wait_ns: int):
+        self._metrics.queue_depth.record(size)
+        self._metrics.lock_wait.record(lock_wait_ns)
+    
+    def _add_order(self, order: Order) -> TradeSlice:
+        metrics = self._metrics
+        if metrics:
+            start = time.perf_counter_ns()
+        order.timestamp_ns = self._clock.now_ns()
+        if self._expiries and self._expiries[0][0] <= order.timestamp_ns:
+            self._expire(order.timestamp_ns)
+        if not self._admit_order(order):
+            trades = self._trades.empty()
+        else:
+            ## only commands the book accepts are journaled, so replaying the journal can never fail on one
+            if self._journal:
+                self._journal.append(order.timestamp_ns, order)
+            trades = self._place_admitted(order)
+        if metrics:
+            metrics.add.record(time.perf_counter_ns() - start)
+            metrics.adds += 1
+        return trades
+    
+    def _place_order(self, order: Order) -> TradeSlice:
+        if not self._admit_order(order):
+            return self._trades.empty()
+        return self._place_admitted(order)
+    
+    def _admit_order(self, order: Order) -> bool:
+        """Checks an arriving order and fills in its ticks and expiry; logs and returns False when it is rejected."""
+        if order.order_id in self._orders:
+            self._log.log(logging.WARNING, "Duplicate order ID %s rejected.", order.order_id)
+            return False
+        
+        if order.initial_quantity <= 0:
+            self._log.log(logging.WARNING, "Order %s rejected: quantity %s is not positive", order.order_id, order.initial_quantity)
+            return False
+        
+        try:
+            ## a Market order takes whatever price the book offers, its own price is never looked at
+            order.price_ticks = 0 if order.order_type == OrderType.Market else self._instrument.to_ticks(order.price)
+        except ValueError as e:
+            self._log.log(logging.WARNING, "Order %s rejected: %s", order.order_id, str(e))
+            return False
+        if order.price_ticks <= 0 and order.order_type != OrderType.Market:
+            self._log.log(logging.WARNING, "Order %s rejected: limit price %s is not positive", order.order_id, order.price)
+            return False
+        
+        if order.order_type in _EXPIRING_ORDER_TYPES:
+            if order.expiry_ns is None and order.order_type == OrderType.GoodForDay:
+                order.expiry_ns = self._session_close(order.timestamp_ns)
+            if order.expiry_ns is None or order.expiry_ns <= order.timestamp_ns:
+                self._log.log(logging.WARNING, "%s order %s rejected: expiry %s is not after its arrival at %s",
+                              order.order_type.name, order.order_id, order.expiry_ns, order.timestamp_ns)
                 return False
-            order: Order = order_entry.order
-            queue: deque = order_entry.location
-            
-            applicable_book = self._bids if order.side == OrderSide.BUY else self._asks
-            
-            
-            if order in queue:
-                queue.remove(order)
-                self._orders.pop(order_id, None)
-            
-                if order.price in self._level_data:
-                    self._level_data[order.price].remove_quantity(order.remaining_quantity)
-                    
-                    if self._level_data[order.price].quantity == 0:
-                        self._level_data.pop(order.price, None)
-                if not queue:
-                    applicable_book.pop(order.price, None)
-                logger.info(f"Cancelled order {order_id}")    
-                self._on_order_cancel(order)
-                return True
-            logger.warning(f"Order {order_id} not found in queue during cancel.")
+        
+        if self._auction and order.order_type not in RESTING_ORDER_TYPES:
+            self._log.log(logging.WARNING, "%s order %s rejected: only resting orders are accepted during a call auction",
+                          order.order_type.name, order.order_id)
             return False
+        return True
     
+    def _place_admitted(self, order: Order) -> TradeSlice:
+        order.sequence = self._next_sequence
+        self._next_sequence += 1
+        
+        if order.order_type == OrderType.FillAndKill and not self.can_match(order.side, order.price_ticks):
+            if self._log.enabled_for(logging.INFO):
+                self._log.log(logging.INFO, "FillAndKill order %s was unable to be matched and was discarded", order.order_id)
+            return self._trades.empty()
+        
+        applicable_book = self._bids if order.side == OrderSide.BUY else self._asks
+        
+        if order.order_type == OrderType.FillOrKill and not self.can_fully_filled(order.side, order.price_ticks, order.initial_quantity):
+            return self._trades.empty()
+        
+        if self._auction:
+            trades = self._trades.empty()
+        elif self._metrics:
+            start = time.perf_counter_ns()
+            trades = self.match_orders(order)
+            self._metrics.match.record(time.perf_counter_ns() - start)
+            self._metrics.fills += len(trades)
+            self._metrics.filled_quantity += order.initial_quantity - order.remaining_quantity
+        else:
+            trades = self.match_orders(order)
+        
+        if order.is_filled():
+            return trades
+        
+        if order.order_type not in RESTING_ORDER_TYPES:
+            if self._log.enabled_for(logging.INFO):
+                self._log.log(logging.INFO, "%s order %s cancelled with %s unfilled", order.order_type.name, order.order_id,
+                              order.remaining_quantity)
+            return trades
+        
+        handle = self._store.allocate(
+            order.order_id,
+            SIDE_CODES[order.side],
+            ORDER_TYPE_CODES[order.order_type],
+            order.price_ticks,
+            order.initial_quantity,
+            order.remaining_quantity,
+            order.timestamp_ns,
+            order.sequence,
+            order.expiry_ns if order.order_type in _EXPIRING_ORDER_TYPES else 0
+        )
+        level: LevelQueue = applicable_book.get_or_create(order.price_ticks)
+        level.append(handle)
+        self._orders[order.order_id] = handle
+        if order.order_type in _EXPIRING_ORDER_TYPES:
+            self._schedule_expiry(order.expiry_ns, order.sequence, order.order_id)
+        
+        self._on_order_added(applicable_book, level.data, order.remaining_quantity)
+        if self._log.enabled_for(logging.INFO):
+            self._log.log(logging.INFO, "Added %s order %s: %s %s @ %s", order.order_type.name, order.order_id,
+                          order.side.name, order.remaining_quantity, order.price)
+        return trades
+    
+    def _ingest(self, kinds, order_ids, sides, order_types, prices, quantities) -> TradeSlice:
+        metrics = self._metrics
+        if metrics:
+            started = time.perf_counter_ns()
+        timestamp_ns = self._clock.now_ns()
+        if self._expiries and self._expiries[0][0] <= timestamp_ns:
+            self._expire(timestamp_ns)
+        start = self._trades.position
+        place, remove, orders = self._place_row, self._remove_order, self._orders
+        adds = cancels = misses = 0
+        for kind, order_id, side, order_type, price, quantity in zip(kinds, order_ids, sides, order_types, prices, quantities):
+            if kind == INGEST_ADD:
+                place(order_id, side, order_type, price, quantity, timestamp_ns)
+                adds += 1
+            elif order_id in orders:
+                remove(order_id)
+                cancels += 1
+            else:
+                misses += 1 ## already filled or cancelled, which is routine for simulated flow
+        if metrics:
+            metrics.ingest.record(time.perf_counter_ns() - started)
+            metrics.adds += adds
+            metrics.cancels += cancels
+            metrics.cancel_misses += misses
+            metrics.fills += self._trades.position - start
+            metrics.filled_quantity += self._trades.filled(start, self._trades.position)
+        return self._trades.slice(start)
+    
+    def _place_row(self, order_id: int, side: int, order_type: int, price_ticks: int, quantity: int, timestamp_ns: int):
+        """``_place_order`` for one ingested row: the same checks, matching and resting, on plain fields."""
+        if order_id in self._orders or quantity <= 0 or (price_ticks <= 0 and order_type != _MARKET):
+            return
+        if self._auction and order_type != _GOOD_TILL_CANCEL:
+            return
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        
+        is_buy = side == _BUY
+        if order_type == _FILL_AND_KILL and not self.can_match(SIDES[side], price_ticks):
+            return
+        if order_type == _FILL_OR_KILL and not self.can_fully_filled(SIDES[side], price_ticks, quantity):
+            return
+        remaining = quantity if self._auction else self._match(is_buy, order_type == _MARKET, price_ticks, order_id, quantity, timestamp_ns)
+        if remaining == 0 or order_type != _GOOD_TILL_CANCEL:
+            return
+        
+        handle = self._store.allocate(order_id, side, order_type, price_ticks, quantity, remaining, timestamp_ns, sequence)
+        applicable_book = self._bids if is_buy else self._asks
+        level: LevelQueue = applicable_book.get_or_create(price_ticks)
+        level.append(handle)
+        self._orders[order_id] = handle
+        self._on_order_added(applicable_book, level.data, remaining)
     
-    def order_modify(self, order: OrderModify) -> List[Trade]:
-        order_entry = self._orders.get(order.order_id)
-        if not order_entry:
-            logger.warning(f"Modify failed: order ID {order.order_id} not found.")
-            return []
+    def _cancel_order(self, order_id: int) -> bool:
+        metrics = self._metrics
+        if metrics:
+            start = time.perf_counter_ns()
+        if self._expiries or self._journal:
+            now_ns = self._clock.now_ns()
+            if self._expiries and self._expiries[0][0] <= now_ns:
+                self._expire(now_ns)
+            if self._journal and order_id in self._orders:
+                self._journal.append(now_ns, OrderCancel(order_id))
+        cancelled = self._remove_order(order_id)
+        if metrics:
+            metrics.cancel.record(time.perf_counter_ns() - start)
+            if cancelled:
+                metrics.cancels += 1
+            else:
+                metrics.cancel_misses += 1
+        return cancelled
+    
+    def _remove_order(self, order_id: int) -> bool:
+        handle: Optional[int] = self._orders.pop(order_id, None)
+        if handle is None:
+            self._log.log(logging.WARNING, "Cancel failed: Order ID: %s not found.", order_id)
+            return False
+        store = self._store
+        price_ticks: int = store.prices[handle]
+        remaining: int = store.remaining[handle]
+        
+        applicable_book = self._bids if store.sides[handle] == _BUY else self._asks
+        queue: LevelQueue = applicable_book[price_ticks]
+        queue.remove(handle)
+        store.release(handle)
+        
+        self._on_order_cancel(applicable_book, queue.data, remaining)
+        if not queue:
+            applicable_book.pop(price_ticks, None)
+        if self._log.enabled_for(logging.INFO):
+            self._log.log(logging.INFO, "Cancelled order %s", order_id)
+        return True
+    
+    def _order_modify(self, order: OrderModify) -> TradeSlice:
+        metrics = self._metrics
+        if metrics:
+            start = time.perf_counter_ns()
+        timestamp_ns = self._clock.now_ns()
+        if self._expiries and self._expiries[0][0] <= timestamp_ns:
+            self._expire(timestamp_ns)
+        if not self._admit_modify(order):
+            trades = self._trades.empty()
+        else:
+            if self._journal:
+                self._journal.append(timestamp_ns, order)
+            trades = self._replace_admitted(order, timestamp_ns)
+        if metrics:
+            metrics.modify.record(time.perf_counter_ns() - start)
+            metrics.modifies += 1
+        return trades
+    
+    def _replace_order(self, order: OrderModify, timestamp_ns: int) -> TradeSlice:
+        if not self._admit_modify(order):
+            return self._trades.empty()
+        return self._replace_admitted(order, timestamp_ns)
+    
+    def _admit_modify(self, order: OrderModify) -> bool:
+        """Checks a modify against the book and fills in its ticks; logs and returns False when it is rejected."""
+        if order.order_id not in self._orders:
+            self._log.log(logging.WARNING, "Modify failed: order ID %s not found.", order.order_id)
+            return False
+        if order.quantity <= 0:
+            self._log.log(logging.WARNING, "Modify failed for order ID %s: quantity %s is not positive", order.order_id, order.quantity)
+            return False
+        try:
+            order.price_ticks = self._instrument.to_ticks(order.price)
+        except ValueError as e:
+            self._log.log(logging.WARNING, "Modify failed for order ID %s: %s", order.order_id, str(e))
+            return False
+        if order.price_ticks <= 0:
+            self._log.log(logging.WARNING, "Modify failed for order ID %s: price %s is not positive", order.order_id, order.price)
+            return False
+        return True
+    
+    def _replace_admitted(self, order: OrderModify, timestamp_ns: int) -> TradeSlice:
+        """Applies a modify: ``order.quantity`` becomes the order's open quantity at ``order.price``.
+
+        Reducing the quantity (or leaving it) at the same side and price is
+        done in place and keeps time priority. Anything else takes the order
+        out and enters it again as a new order, at the back of its level and
+        able to trade straight away. ``order.remaining`` is set to what is left
+        resting afterwards.
+        """
+        handle = self._orders[order.order_id]
+        store = self._store
+        remaining: int = store.remaining[handle]
+        if order.quantity <= remaining and order.price_ticks == store.prices[handle] \
+                and SIDE_CODES[order.side] == store.sides[handle]:
+            ## same side and price, no bigger: shrink the resting order where it is and keep its queue position
+            reduction = remaining - order.quantity
+            if reduction:
+                store.remaining[handle] = order.quantity
+                store.quantities[handle] -= reduction
+                applicable_book = self._bids if store.sides[handle] == _BUY else self._asks
+                self._on_order_reduced(applicable_book, applicable_book[order.price_ticks].data, reduction)
+            order.remaining = order.quantity
+            if self._metrics:
+                self._metrics.modifies_in_place += 1
+            if self._log.enabled_for(logging.INFO):
+                self._log.log(logging.INFO, "Reduced order %s in place to %s @ %s", order.order_id, order.quantity, order.price)
+            return self._trades.empty()
 
-        logger.info(f"Modifying order {order.order_id} -> {order.quantity} @ {order.price}")
-        self.cancel_order(order.order_id)
+        if self._log.enabled_for(logging.INFO):
+            self._log.log(logging.INFO, "Modifying order %s -> %s @ %s", order.order_id, order.quantity, order.price)
+        order_type: OrderType = ORDER_TYPES[store.order_types[handle]]
+        expiry_ns: int = store.expiries[handle]
+        self._remove_order(order.order_id)
 
         new_order = Order(
-            _order_type=order_entry.order.order_type,
+            _order_type=order_type,
             _order_id=order.order_id,
             _side=order.side,
             _price=order.price,
-            _initial_quantity=order.quantity
+            _initial_quantity=order.quantity,
+            _expiry_ns=expiry_ns or None
         )
+        new_order.timestamp_ns = timestamp_ns
 
-        return self.add_order(new_order)
+        trades = self._place_order(new_order)
+        order.remaining = new_order.remaining_quantity if new_order.order_id in self._orders else 0
+        return trades
+    
+    def _auction_command(self, begin: bool) -> Optional[AuctionResult]:
+        if begin == self._auction:
+            raise ValueError("the book is already in a call auction" if begin else "the book is not in a call auction")
+        timestamp_ns = self._clock.now_ns()
+        if self._expiries and self._expiries[0][0] <= timestamp_ns:
+            self._expire(timestamp_ns)
+        if self._journal:
+            self._journal.append(timestamp_ns, AuctionCommand(begin))
+        return self._apply_auction(begin, timestamp_ns)
+    
+    def _apply_auction(self, begin: bool, timestamp_ns: int) -> Optional[AuctionResult]:
+        if begin:
+            self._auction = True
+            logger.info("Call auction started")
+            return None
+        self._auction = False
+        price_ticks, volume, imbalance = self._clearing_price()
+        trades: TradeBuffer = self._trades
+        start = trades.position
+        if volume:
+            record = trades.record
+            ## both sides give up exactly ``volume``; pair them off in priority order at the one price
+            buys = iter(self._take_from_side(self._bids, volume))
+            sells = iter(self._take_from_side(self._asks, volume))
+            bid_id, bid_left = next(buys)
+            ask_id, ask_left = next(sells)
+            while True:
+                quantity = min(bid_left, ask_left)
+                record(bid_id, ask_id, price_ticks, quantity, timestamp_ns, NO_AGGRESSOR)
+                bid_left -= quantity
+                ask_left -= quantity
+                if not bid_left:
+                    bid_id, bid_left = next(buys, (None, 0))
+                if not ask_left:
+                    ask_id, ask_left = next(sells, (None, 0))
+                if not bid_left or not ask_left:
+                    break
+            if self._metrics:
+                self._metrics.fills += trades.position - start
+                self._metrics.filled_quantity += volume
+        logger.info(f"Call auction ended: uncrossed {volume} @ {price_ticks} ticks in {trades.position - start} fills, "
+                    f"imbalance {imbalance}")
+        return AuctionResult(price_ticks, volume, imbalance, trades.slice(start), self._instrument)
+    
+    def _clearing_price(self) -> Tuple[Optional[int], int, int]:
+        best_bid, best_ask = self._bids.best_price(), self._asks.best_price()
+        if best_bid is None or best_ask is None or best_bid < best_ask:
+            return None, 0, 0
+        ## only levels between the best ask and the best bid can trade, and they hold all the demand and supply there
+        bids = [(price, level.data.quantity) for price, level in takewhile(lambda item: item[0] >= best_ask, self._bids.items())]
+        asks = [(price, level.data.quantity) for price, level in takewhile(lambda item: item[0] <= best_bid, self._asks.items())]
+        return clearing_price(bids, asks)
+    
+    def _take_from_side(self, book: BookSide, volume: int) -> List[Tuple[int, int]]:
+        """Takes ``volume`` off ``book`` from its best level on, in time priority; returns ``(order id, quantity)`` per order.
 
+        Levels are consumed the way ``match_orders`` does it: whole levels in
+        bulk, the last one from the front, with one aggregate update per level.
+        """
+        store, orders = self._store, self._orders
+        order_ids, resting_remaining, next_handle = store.order_ids, store.remaining, store.next
+        taken: List[Tuple[int, int]] = []
+        while volume > 0:
+            price: int = book.best_price()
+            level: LevelQueue = book[price]
+            level_data: LevelData = level.data
+            if volume >= level_data.quantity:
+                handle: int = level.head
+                while handle != NIL:
+                    resting_id: int = order_ids[handle]
+                    taken.append((resting_id, resting_remaining[handle]))
+                    del orders[resting_id]
+                    store.release(handle)
+                    handle = next_handle[handle]
+                filled, emptied = level_data.quantity, level_data.count
+                book.pop(price)
+            else:
+                filled = emptied = 0
+                while filled < volume:
+                    handle = level.head
+                    resting_id = order_ids[handle]
+                    quantity = min(volume - filled, resting_remaining[handle])
+                    resting_remaining[handle] -= quantity
+                    filled += quantity
+                    taken.append((resting_id, quantity))
+                    if resting_remaining[handle] == 0:
+                        level.popleft()
+                        del orders[resting_id]
+                        store.release(handle)
+                        emptied += 1
+            volume -= filled
+            self._on_level_matched(book, level_data, filled, emptied)
+        return taken
     
     def size(self) -> int:
         with self._mutex:
             return len(self._orders)
+    
+    def get_order(self, order_id: int) -> Optional[Order]:
+        """Returns a detached snapshot of a resting order, or None if it is not in the book."""
+        with self._mutex:
+            handle = self._orders.get(order_id)
+            if handle is None:
+                return None
+            return self._store.view(handle, self._instrument)
         
-    def can_fully_filled(self, side: OrderSide, price: float, quantity: int) -> bool:
-        if not self.can_match(side, price):
-            return False
-        threshold = None
-        
-        if side == OrderSide.BUY:
-            threshold = min(self._asks)
-        else:
-            threshold = max(self._bids)
-        
-        for level_price, level_data in self._level_data.items():
-            if threshold is not None:
-                if side == OrderSide.BUY and threshold > level_price:
-                    continue
-                if side == OrderSide.SELL and threshold < level_price:
-                    continue
-            if side == OrderSide.BUY and level_price > price:
-                continue
-            if side == OrderSide.SELL and level_price < price:
-                continue
-            
-            if quantity <= level_data.quantity:
-                return True
-            
-            quantity -= level_data.quantity
-        return False
-                
+    def can_fully_filled(self, side: OrderSide, price_ticks: int, quantity: int) -> bool:
+        opposite_book = self._asks if side == OrderSide.BUY else self._bids
+        return opposite_book.depth_index.quantity_through(price_ticks) >= quantity
+    
+    def quantity_available(self, side: OrderSide, price: float) -> int:
+        """Quantity an order on ``side`` limited at ``price`` could trade against right now."""
+        price_ticks = self._instrument.to_ticks(price)
+        with self._mutex:
+            opposite_book = self._asks if side == OrderSide.BUY else self._bids
+            return opposite_book.depth_index.quantity_through(price_ticks)
+    
+    def price_to_fill(self, side: OrderSide, quantity: int) -> Optional[float]:
+        """Worst price an order on ``side`` would reach to fill ``quantity``, or None if the book is too thin."""
+        with self._mutex:
+            opposite_book = self._asks if side == OrderSide.BUY else self._bids
+            price_ticks = opposite_book.depth_index.price_for(quantity)
+        return None if price_ticks is None else self._instrument.to_price(price_ticks)
             
     
     def get_order_infos(self) -> OrderBookLevelInfos:
         with self._mutex:
-            bid_infos = []
-            ask_infos = []
-            level_info = lambda price, orders: LevelInfo(
-                _price=price,
-                _quantity = sum(order.remaining_quantity for order in orders)
-            )
-            
-            for price, orders in self._bids.items():
-                bid_infos.append(level_info(price, orders))
-            
-            for price, orders in self._asks.items():
-                ask_infos.append(level_info(price, orders))
-            
+            bid_infos = [self._level_info(level.data) for _, level in self._bids.items()]
+            ask_infos = [self._level_info(level.data) for _, level in self._asks.items()]
+            return OrderBookLevelInfos(bid_infos, ask_infos)
+    
+    def get_depth(self, n: int) -> OrderBookLevelInfos:
+        """Returns the ``n`` best levels per side, best first, from the maintained level aggregates."""
+        with self._mutex:
+            bid_infos = [self._level_info(level_data) for level_data in self._bids.depth(n)]
+            ask_infos = [self._level_info(level_data) for level_data in self._asks.depth(n)]
             return OrderBookLevelInfos(bid_infos, ask_infos)
     
+    def subscribe_l2(self, conflation: Optional[float] = None) -> L2Subscription:
+        """Subscribes to per-level changes, starting from the book as it is now.
+
+        With ``conflation`` (in seconds) the subscriber gets at most one update
+        per level per interval, always the latest, instead of every change.
+        """
+        with self._mutex:
+            if self._feed is None:
+                self._feed = L2Feed(self._instrument)
+            levels = [(book.side, level_data.price, level_data.quantity, level_data.count)
+                      for book in (self._bids, self._asks) for level_data in book.depth(len(book))]
+            return self._feed.subscribe(conflation, levels)
+    
+    def snapshot(self, path: str) -> int:
+        """Writes every resting order to a columnar snapshot file and returns how many were written.
+
+        Orders are written level by level in time priority, so restoring keeps
+        queue positions. The journal position at the time of the snapshot is
+        recorded too; restoring and then replaying the journal from there
+        reproduces the book.
+        """
+        with self._mutex:
+            if self._auction:
+                raise ValueError("cannot snapshot a book during a call auction, its resting orders may cross")
+            store = self._store
+            handles = array('q')
+            columns = {"level_prices": array('q'), "level_counts": array('q'), "level_quantities": array('q'),
+                       "level_sides": array('b')}
+            for book in (self._bids, self._asks):
+                side_code = SIDE_CODES[book.side]
+                for price, level in book.items():
+                    handles.extend(level)
+                    columns["level_prices"].append(price)
+                    columns["level_counts"].append(len(level))
+                    columns["level_quantities"].append(level.data.quantity)
+                    columns["level_sides"].append(side_code)
+            for name in _STORE_COLUMNS:
+                column = getattr(store, name)
+                columns[name] = array(column.typecode, map(column.__getitem__, handles))
+            journal_position = self._journal.position if self._journal else 0
+            next_sequence = self._next_sequence
+        self._sync_journal()
+        write_snapshot(path, self._instrument.symbol, self._instrument.tick_size, journal_position, next_sequence, columns)
+        logger.info(f"Wrote snapshot of {len(handles)} orders to {path}")
+        return len(handles)
+    
+    def restore(self, path: str) -> int:
+        """Bulk-loads a snapshot into this empty book, without matching, and returns its journal position."""
+        if self._journal:
+            raise ValueError("a journaled book restores through OrderBook(snapshot_path=..., journal_path=...)")
+        with Snapshot(path) as snapshot, self._mutex:
+            if self._orders:
+                raise ValueError("can only restore a snapshot into an empty book")
+            if (snapshot.symbol, snapshot.tick_size) != (self._instrument.symbol, self._instrument.tick_size):
+                raise ValueError(f"snapshot of {snapshot.symbol} at tick {snapshot.tick_size} does not match "
+                                 f"{self._instrument.symbol} at tick {self._instrument.tick_size}")
+            store = self._store
+            store.load({name: snapshot.column(name) for name in _STORE_COLUMNS})
+            prev, nxt = store.prev, store.next
+            start = 0
+            levels = zip(snapshot.column("level_prices"), snapshot.column("level_counts"),
+                         snapshot.column("level_quantities"), snapshot.column("level_sides"))
+            for price, count, quantity, side_code in levels:
+                end = start + count - 1
+                prev[start] = NIL
+                nxt[end] = NIL
+                book = self._bids if side_code == _BUY else self._asks
+                level = book.get_or_create(price)
+                level.adopt(start, end, count)
+                level.data.quantity = quantity
+                level.data.count = count
+                book.depth_index.add(price, quantity)
+                start = end + 1
+            self._orders = dict(zip(store.order_ids, range(len(store.order_ids))))
+            self._expiries = [(expiry, sequence, order_id)
+                              for order_id, sequence, expiry in zip(store.order_ids, store.sequences, store.expiries) if expiry]
+            heapq.heapify(self._expiries)
+            self._expiry_wakeup.set()
+            self._next_sequence = snapshot.next_sequence
+            logger.info(f"Restored {len(self._orders)} orders from {path}")
+            return snapshot.journal_position
+    
     def cancel_orders(self, order_ids: List[int]):
-        for id in order_ids:
-            self.cancel_order(id)
+        self._lock()
+        try:
+            for id in order_ids:
+                self._cancel_order(id)
+        finally:
+            self._mutex.release()
+        self._sync_journal()
+    
+    def stats(self) -> dict:
+        """Book gauges, plus counters and latency histogram summaries (in ns) when built with ``metrics=True``."""
+        with self._mutex:
+            stats = {"gauges": {
+                "resting_orders": len(self._orders),
+                "bid_levels": len(self._bids),
+                "ask_levels": len(self._asks),
+                "bid_depth_outliers": self._bids.depth_index.outliers,
+                "ask_depth_outliers": self._asks.depth_index.outliers,
+                "trades": self._trades.position,
+                "expiry_entries": len(self._expiries),
+            }}
+            if self._metrics:
+                stats.update(self._metrics.snapshot())
+        return stats
     
-    def _update_level_data(self, price: float, quantity: int, level_data_action: LevelAction):
-        level_data: LevelData = self._level_data.get(price, None)
-        if level_data:
-            level_data.update(quantity, level_data_action) 
+    def reset_stats(self):
+        if self._metrics:
+            with self._mutex:
+                self._metrics.reset()
+    
+    def _prepare_batch(self, messages: List[Union[Order, OrderCancel, OrderModify]]) -> List[tuple]:
+        batch = []
+        for message in messages:
+            if isinstance(message, Order):
+                batch.append((self._add_order, message))
+            elif isinstance(message, OrderCancel):
+                batch.append((self._cancel_order, message.order_id))
+            elif isinstance(message, OrderModify):
+                batch.append((self._order_modify, message))
+            else:
+                raise ValueError(f"Unsupported batch message {message!r}: expected Order, OrderCancel or OrderModify")
+        return batch
+    
+    def _run_batch(self, batch: List[tuple]) -> List[Union[TradeSlice, bool]]:
+        return [handler(argument) for handler, argument in batch]
+    
+    def _replay_journal(self, journal: Journal, offset: int = 0):
+        """Rebuilds the book from ``journal`` without re-journaling, then starts journaling to it."""
+        if offset > journal.position:
+            logger.warning(f"Journal {journal.path} ends at {journal.position}, before the snapshot's position {offset}")
+        replayed = skipped = 0
+        for position, timestamp_ns, message in journal.records(offset):
+            if self._expiries and self._expiries[0][0] <= timestamp_ns:
+                self._expire(timestamp_ns)
+            try:
+                if isinstance(message, Order):
+                    message.timestamp_ns = timestamp_ns
+                    self._place_order(message)
+                elif isinstance(message, OrderCancel):
+                    self._remove_order(message.order_id)
+                elif isinstance(message, AuctionCommand):
+                    self._apply_auction(message.begin, timestamp_ns)
+                else:
+                    self._replace_order(message, timestamp_ns)
+            except ValueError as e:
+                ## journals written before commands were checked on the way in can hold ones that never applied
+                logger.warning(f"Skipped journal record ending at {position} in {journal.path}: {message!r} failed with {e}")
+                skipped += 1
+                continue
+            replayed += 1
+        logger.info(f"Replayed {replayed} journaled commands from {journal.path} ({skipped} skipped), "
+                    f"{len(self._orders)} orders resting")
+        self._journal = journal
     
-    def _on_order_match(self, price: float, quantity: int, is_fully_filled: bool):
-        self._update_level_data(price, quantity, LevelAction.REMOVE if is_fully_filled else LevelAction.MATCH)
+    def _sync_journal(self):
+        if self._journal:
+            self._journal.flush()
+    
+    def _level_info(self, level_data: LevelData) -> LevelInfo:
+        return LevelInfo(level_data.price, level_data.quantity, self._instrument, level_data.count)
+    
+    def _on_level_matched(self, book: BookSide, level_data: LevelData, quantity: int, filled_orders: int):
+        level_data.quantity -= quantity
+        level_data.count -= filled_orders
+        book.depth_index.add(level_data.price, -quantity)
+        if self._feed:
+            self._feed.publish(book.side, level_data.price, level_data.quantity, level_data.count)
         
-    def _on_order_added(self, order: Order):
-        self._update_level_data(order.price, order.initial_quantity, LevelAction.ADD)
+    def _on_order_added(self, book: BookSide, level_data: LevelData, quantity: int):
+        level_data.update(quantity, LevelAction.ADD)
+        book.depth_index.add(level_data.price, quantity)
+        if self._feed:
+            self._feed.publish(book.side, level_data.price, level_data.quantity, level_data.count)
         
-    def _on_order_cancel(self, order):
-        self._update_level_data(order.price, order.initial_quantity, LevelAction.REMOVE)
+    def _on_order_cancel(self, book: BookSide, level_data: LevelData, quantity: int):
+        level_data.update(quantity, LevelAction.REMOVE)
+        book.depth_index.add(level_data.price, -quantity)
+        if self._feed:
+            self._feed.publish(book.side, level_data.price, level_data.quantity, level_data.count)
+    
+    def _on_order_reduced(self, book: BookSide, level_data: LevelData, quantity: int):
+        level_data.update(quantity, LevelAction.MATCH) ## quantity leaves the level, the order stays
+        book.depth_index.add(level_data.price, -quantity)
+        if self._feed:
+            self._feed.publish(book.side, level_data.price, level_data.quantity, level_data.count)
+    
+    def _on_orders_expired(self, book: BookSide, level_data: LevelData, quantity: int, count: int):
+        level_data.quantity -= quantity
+        level_data.count -= count
+        book.depth_index.add(level_data.price, -quantity)
+        if self._feed:
+            self._feed.publish(book.side, level_data.price, level_data.quantity, level_data.count)
 
-    def _prune_good_for_day_orders(self):
+    def _session_close(self, timestamp_ns: int) -> int:
+        """Next market close (local time) after ``timestamp_ns``, when GoodForDay orders expire."""
+        now = datetime.fromtimestamp(timestamp_ns / 1e9)
+        market_close = now.replace(hour=_MARKET_CLOSE_HOUR, minute=0, second=0, microsecond=0)
+        if now >= market_close:
+            market_close += timedelta(days=1)
+        return int(market_close.timestamp()) * 1_000_000_000
+    
+    def _schedule_expiry(self, expiry_ns: int, sequence: int, order_id: int):
+        expiries = self._expiries
+        if len(expiries) > 2 * len(self._orders) + 1024:
+            ## mostly entries for orders that are gone; drop them rather than let the heap grow without bound
+            store, orders = self._store, self._orders
+            self._expiries = expiries = [entry for entry in expiries
+                                         if entry[2] in orders and store.sequences[orders[entry[2]]] == entry[1]]
+            heapq.heapify(expiries)
+        heapq.heappush(expiries, (expiry_ns, sequence, order_id))
+        if expiries[0][1] == sequence:
+            self._expiry_wakeup.set() ## new earliest expiry, the timer has to wake up sooner
+    
+    def _expire(self, now_ns: int) -> int:
+        """Removes every resting order whose expiry is at or before ``now_ns``, one pass per affected level."""
+        expiries, orders, store = self._expiries, self._orders, self._store
+        levels: Dict[Tuple[int, int], List[int]] = {} ## (side code, price) -> handles expiring there
+        while expiries and expiries[0][0] <= now_ns:
+            _, sequence, order_id = heapq.heappop(expiries)
+            handle = orders.get(order_id)
+            if handle is None or store.sequences[handle] != sequence:
+                continue ## cancelled, filled or re-entered by a modify since it was scheduled
+            del orders[order_id]
+            levels.setdefault((store.sides[handle], store.prices[handle]), []).append(handle)
+        
+        expired = 0
+        for (side_code, price), handles in levels.items():
+            book = self._bids if side_code == _BUY else self._asks
+            queue: LevelQueue = book[price]
+            quantity = 0
+            for handle in handles:
+                quantity += store.remaining[handle]
+                queue.remove(handle)
+                store.release(handle)
+            self._on_orders_expired(book, queue.data, quantity, len(handles))
+            if not queue:
+                book.pop(price)
+            expired += len(handles)
+        
+        if expired:
+            if self._metrics:
+                self._metrics.expired += expired
+            if self._log.enabled_for(logging.INFO):
+                self._log.log(logging.INFO, "Expired %s orders from %s levels", expired, len(levels))
+        return expired
+    
+    def _run_expiry_timer(self):
+        """Expires orders on time while no commands are arriving; commands expire what is due themselves."""
         while not self._shutdown_flag.is_set():
-            now = datetime.now()
-            market_close = now.replace(hour=16, minute=0, second=0, microsecond=0)
-
-            if now >= market_close:
-                market_close += timedelta(days=1)
-
-            sleep_time = (market_close - now).total_seconds() + 0.1
-
-            with self._shutdown_condition:
-                self._shutdown_condition.wait(timeout=sleep_time)
-                if self._shutdown_flag.is_set():
-                    return
-
-            gfd_order_ids = []
-
+            self._expiry_wakeup.clear()
             with self._mutex:
-                for order_id, entry in self._orders.items():
-                    if entry.order.order_type == OrderType.GoodForDay:
-                        gfd_order_ids.append(order_id)
-
-            self.cancel_orders(gfd_order_ids)  
+                now_ns = self._clock.now_ns()
+                if self._expiries and self._expiries[0][0] <= now_ns:
+                    self._expire(now_ns)
+                next_expiry = self._expiries[0][0] if self._expiries else None
+            timeout = None if next_expiry is None else max(0.0, (next_expiry - self._clock.now_ns()) / 1e9)
+            self._expiry_wakeup.wait(timeout)
     
     def shutdown(self):
+        if self._reporter:
+            self._reporter.stop()
         self._shutdown_flag.set()
-        with self._shutdown_condition:
-            self._shutdown_condition.notify()
-        self._gfd_pruner_thread.join()
+        self._expiry_wakeup.set()
+        if self._expiry_thread:
+            self._expiry_thread.join()
 
         if self._executor:
             self._executor.shutdown(wait=True)            
+        if self._sequencer:
+            self._sequencer.stop()
+        if self._journal:
+            self._journal.close()
+        if self._feed:
+            self._feed.close()
+        self._log.close()
             
         
         
@@ -0,0 +1,135 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Iterator, Optional, Tuple
+
+from Protocol.Codec import Message, decode_message, encode_message
+
+logger = logging.getLogger(__name__)
+
+## body length, crc32 of everything after the crc, then the command's timestamp
+_RECORD = struct.Struct('<IIq')
+_CHECKED = struct.Struct('<q')
+
+
+def read_journal(path: str, offset: int = 0) -> Iterator[Tuple[int, int, Message]]:
+    """Reads a journal file without opening it for writing, so recorded flow can be replayed from a copy."""
+    for end, timestamp_ns, body in _scan(path, offset):
+        message, _ = decode_message(body)
+        yield end, timestamp_ns, message
+
+
+def _scan(path: str, offset: int) -> Iterator[Tuple[int, int, bytes]]:
+    if not os.path.exists(path) or os.path.getsize(path) <= offset:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        view = memoryview(data)
+        try:
+            size = len(data)
+            while offset + _RECORD.size <= size:
+                length, crc, timestamp_ns = _RECORD.unpack_from(view, offset)
+                end = offset + _RECORD.size + length
+                if end > size:
+                    return
+                body = bytes(view[offset + _RECORD.size:end])
+                if zlib.crc32(body, zlib.crc32(_CHECKED.pack(timestamp_ns))) != crc:
+                    return
+                yield end, timestamp_ns, body
+                offset = end
+        finally:
+            view.release()
+
+
+class Journal:
+    """Append-only binary log of the commands applied to an OrderBook.
+
+    Each record is ``length, crc32, timestamp_ns`` followed by the command
+    encoded with Protocol.Codec. ``append`` only copies the record into an
+    in-memory buffer, so it is cheap enough to call under the book's lock;
+    ``flush`` makes everything appended before it durable. Concurrent flushes
+    are group-committed: the first caller writes and fsyncs whatever has been
+    buffered by then while the others wait, and one fsync releases them all.
+
+    Opening a journal truncates a torn or corrupt record left at its tail by a
+    crash, so the file always ends on a complete record.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self._path = path
+        self._fsync = fsync
+        end = 0
+        if os.path.exists(path):
+            for end, _, _ in _scan(path, 0):
+                pass
+            size = os.path.getsize(path)
+            if end < size:
+                logger.warning(f"Journal {path}: discarding {size - end} bytes of incomplete record at offset {end}")
+                os.truncate(path, end)
+        self._file = open(path, "ab")
+        self._buffer = bytearray()
+        self._appended = end ## file offset just past the last appended record
+        self._durable = end ## file offset up to which records are known to be on disk
+        self._flushing = False
+        self._failure: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def position(self) -> int:
+        """Offset just past the last appended record; replaying from here replays nothing."""
+        return self._appended
+
+    def append(self, timestamp_ns: int, message: Message) -> int:
+        """Buffers one command and returns the offset just past it."""
+        encoded = encode_message(message)
+        crc = zlib.crc32(encoded, zlib.crc32(_CHECKED.pack(timestamp_ns)))
+        record = _RECORD.pack(len(encoded), crc, timestamp_ns) + encoded
+        with self._lock:
+            self._buffer += record
+            self._appended += len(record)
+            return self._appended
+
+    def flush(self, position: Optional[int] = None):
+        """Blocks until the journal is durable up to ``position``, by default everything appended so far."""
+        with self._flushed:
+            target = self._appended if position is None else position
+            while self._durable < target:
+                if self._failure is not None:
+                    raise IOError(f"journal {self._path} failed to sync") from self._failure
+                if self._flushing:
+                    self._flushed.wait()
+                    continue
+
+                ## become the leader: take everything buffered so far and sync it outside the lock
+                self._flushing = True
+                data, self._buffer = self._buffer, bytearray()
+                end = self._appended
+                self._lock.release()
+                try:
+                    self._file.write(data)
+                    self._file.flush()
+                    if self._fsync:
+                        os.fsync(self._file.fileno())
+                except BaseException as e:
+                    self._failure = e
+                    raise
+                finally:
+                    self._lock.acquire()
+                    self._flushing = False
+                    self._flushed.notify_all()
+                self._durable = end
+
+    def records(self, offset: int = 0) -> Iterator[Tuple[int, int, Message]]:
+        """Yields ``(end offset, timestamp_ns, command)`` for every complete record from ``offset`` on."""
+        return read_journal(self._path, offset)
+
+    def close(self):
+        self.flush()
+        self._file.close()
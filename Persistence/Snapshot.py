@@ -0,0 +1,148 @@
+from array import array
+import mmap
+import os
+import struct
+from typing import Dict
+
+## magic, version, order count, level count, journal position, next order sequence, tick size, symbol
+_HEADER = struct.Struct('<8sIqqqqd32s')
+_HEADER_SIZE = 128
+_MAGIC = b"OBSNAP\x00\x01"
+_VERSION = 3
+
+## (name, array typecode, is a per-level column) in file order; the 8-byte columns come first so every
+## column stays aligned for zero-copy casts
+_LAYOUT = (
+    ("order_ids", 'q', False),
+    ("prices", 'q', False),
+    ("quantities", 'q', False),
+    ("remaining", 'q', False),
+    ("timestamps", 'q', False),
+    ("sequences", 'q', False),
+    ("expiries", 'q', False),
+    ("level_prices", 'q', True),
+    ("level_counts", 'q', True),
+    ("level_quantities", 'q', True),
+    ("sides", 'b', False),
+    ("order_types", 'b', False),
+    ("level_sides", 'b', True),
+)
+
+
+def write_snapshot(path: str, symbol: str, tick_size: float, journal_position: int, next_sequence: int,
+                   columns: Dict[str, array]):
+    """Writes ``columns``, one array per snapshot column name, to ``path`` atomically.
+
+    Orders are expected in book order: bids then asks, levels best first and
+    orders in time priority within a level, with ``level_counts`` giving the
+    length of each level's run.
+    """
+    orders, levels = len(columns["order_ids"]), len(columns["level_prices"])
+    encoded_symbol = symbol.encode()
+    if len(encoded_symbol) > 32:
+        raise ValueError(f"symbol {symbol!r} is longer than the 32 bytes a snapshot can hold")
+    for name, _, is_level in _LAYOUT:
+        if len(columns[name]) != (levels if is_level else orders):
+            raise ValueError(f"snapshot column {name} has {len(columns[name])} rows, expected {levels if is_level else orders}")
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        header = _HEADER.pack(_MAGIC, _VERSION, orders, levels, journal_position, next_sequence, tick_size, encoded_symbol)
+        f.write(header.ljust(_HEADER_SIZE, b"\x00"))
+        for name, code, _ in _LAYOUT:
+            column = columns[name]
+            f.write(column if isinstance(column, array) and column.typecode == code else array(code, column))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    Columns are exposed as typed memoryviews straight over the mapping, so
+    nothing is copied until the caller asks for it.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        if len(self._map) < _HEADER_SIZE:
+            self.close()
+            raise ValueError(f"{path} is too short to be an order book snapshot")
+        magic, version, orders, levels, journal_position, next_sequence, tick_size, symbol = _HEADER.unpack_from(self._view)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {_VERSION} order book snapshot")
+        self._order_count = orders
+        self._level_count = levels
+        self._journal_position = journal_position
+        self._next_sequence = next_sequence
+        self._tick_size = tick_size
+        self._symbol = symbol.rstrip(b"\x00").decode()
+
+        self._columns: Dict[str, memoryview] = {}
+        offset = _HEADER_SIZE
+        for name, code, is_level in _LAYOUT:
+            size = (levels if is_level else orders) * array(code).itemsize
+            if offset + size > len(self._map):
+                self.close()
+                raise ValueError(f"{path} is truncated in column {name}")
+            self._columns[name] = self._view[offset:offset + size].cast(code)
+            offset += size
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def symbol(self) -> str:
+        return self._symbol
+
+    @property
+    def tick_size(self) -> float:
+        return self._tick_size
+
+    @property
+    def journal_position(self) -> int:
+        return self._journal_position
+
+    @property
+    def next_sequence(self) -> int:
+        """Sequence number the book would have given its next order."""
+        return self._next_sequence
+
+    @property
+    def order_count(self) -> int:
+        return self._order_count
+
+    @property
+    def level_count(self) -> int:
+        return self._level_count
+
+    def column(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    def copy_column(self, name: str) -> array:
+        column = self._columns[name]
+        copied = array(column.format)
+        copied.frombytes(column.cast('B'))
+        return copied
+
+    def close(self):
+        for column in getattr(self, "_columns", {}).values():
+            column.release()
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"Snapshot(symbol={self._symbol}, orders={self._order_count}, levels={self._level_count})"
@@ -0,0 +1,131 @@
+"""Fixed-layout binary encoding of order commands and their results.
+
+Every command starts with a one-byte kind followed by little-endian fields:
+
+    ADD     kind, order_id q, side B, order_type B, price d, quantity q
+    ADD_EXPIRING  as ADD, then expiry_ns q; used for orders that carry an expiry
+    CANCEL  kind, order_id q
+    MODIFY  kind, order_id q, side B, price d, quantity q
+    AUCTION kind, begin ?; the book entering or leaving a call auction
+
+Results are either a cancel acknowledgement or the list of trades produced:
+
+    ACK     kind, success ?
+    TRADES  kind, count I, then count x (bid_id q, ask_id q, price_ticks q, quantity q)
+
+Enums travel as the integer codes from OrderStore, prices as the float the
+client submitted; tick conversion still happens inside the OrderBook.
+"""
+import struct
+from typing import Sequence, Tuple, Union
+
+from Auction.Auction import AuctionCommand
+from Instrument.Instrument import Instrument
+from Order.Order import Order
+from Order.OrderCancel import OrderCancel
+from Order.OrderModify import OrderModify
+from Order.OrderStore import ORDER_TYPE_CODES, ORDER_TYPES, SIDE_CODES, SIDES
+from Trade.TradeBuffer import TradeSlice
+from Trade.TradeInfo import Trade, TradeInfo
+
+ADD = 1
+CANCEL = 2
+MODIFY = 3
+ACK = 4
+TRADES = 5
+ADD_EXPIRING = 6
+AUCTION = 7
+
+_KIND = struct.Struct('<B')
+_ADD = struct.Struct('<BqBBdq')
+_ADD_EXPIRING = struct.Struct('<BqBBdqq')
+_CANCEL = struct.Struct('<Bq')
+_MODIFY = struct.Struct('<BqBdq')
+_ACK = struct.Struct('<B?')
+_TRADES = struct.Struct('<BI')
+_TRADE = struct.Struct('<qqqq')
+_AUCTION = struct.Struct('<B?')
+
+Message = Union[Order, OrderCancel, OrderModify, AuctionCommand]
+Result = Union[Sequence[Trade], bool]
+
+
+def encode_message(message: Message) -> bytes:
+    if isinstance(message, Order):
+        if message.expiry_ns is not None:
+            return _ADD_EXPIRING.pack(ADD_EXPIRING, message.order_id, SIDE_CODES[message.side], ORDER_TYPE_CODES[message.order_type],
+                                      message.price, message.initial_quantity, message.expiry_ns)
+        return _ADD.pack(ADD, message.order_id, SIDE_CODES[message.side], ORDER_TYPE_CODES[message.order_type],
+                         message.price, message.initial_quantity)
+    if isinstance(message, OrderCancel):
+        return _CANCEL.pack(CANCEL, message.order_id)
+    if isinstance(message, OrderModify):
+        return _MODIFY.pack(MODIFY, message.order_id, SIDE_CODES[message.side], message.price, message.quantity)
+    if isinstance(message, AuctionCommand):
+        return _AUCTION.pack(AUCTION, message.begin)
+    raise ValueError(f"Cannot encode {message!r}: expected Order, OrderCancel, OrderModify or AuctionCommand")
+
+
+def decode_message(buffer, offset: int = 0) -> Tuple[Message, int]:
+    """Decodes one command at ``offset`` and returns it with the offset just past it."""
+    kind, = _KIND.unpack_from(buffer, offset)
+    if kind == ADD:
+        _, order_id, side, order_type, price, quantity = _ADD.unpack_from(buffer, offset)
+        return Order(ORDER_TYPES[order_type], order_id, SIDES[side], price, quantity), offset + _ADD.size
+    if kind == ADD_EXPIRING:
+        _, order_id, side, order_type, price, quantity, expiry_ns = _ADD_EXPIRING.unpack_from(buffer, offset)
+        return Order(ORDER_TYPES[order_type], order_id, SIDES[side], price, quantity, expiry_ns), offset + _ADD_EXPIRING.size
+    if kind == CANCEL:
+        _, order_id = _CANCEL.unpack_from(buffer, offset)
+        return OrderCancel(order_id), offset + _CANCEL.size
+    if kind == MODIFY:
+        _, order_id, side, price, quantity = _MODIFY.unpack_from(buffer, offset)
+        return OrderModify(order_id, SIDES[side], price, quantity), offset + _MODIFY.size
+    if kind == AUCTION:
+        _, begin = _AUCTION.unpack_from(buffer, offset)
+        return AuctionCommand(begin), offset + _AUCTION.size
+    raise ValueError(f"Unknown message kind {kind} at offset {offset}")
+
+
+def encode_result(result: Result) -> bytes:
+    if isinstance(result, bool):
+        return _ACK.pack(ACK, result)
+    parts = [_TRADES.pack(TRADES, len(result))]
+    if isinstance(result, TradeSlice):
+        ## straight from the book's trade columns, without building Trade objects
+        parts.extend(_TRADE.pack(*row[:4]) for row in result.rows())
+    else:
+        parts.extend(encode_trade(trade) for trade in result)
+    return b"".join(parts)
+
+
+def decode_result(buffer, offset: int, instrument: Instrument) -> Tuple[Result, int]:
+    """Decodes one result at ``offset``; trade prices are interpreted in ``instrument`` ticks."""
+    kind, = _KIND.unpack_from(buffer, offset)
+    if kind == ACK:
+        _, success = _ACK.unpack_from(buffer, offset)
+        return success, offset + _ACK.size
+    if kind == TRADES:
+        _, count = _TRADES.unpack_from(buffer, offset)
+        offset += _TRADES.size
+        trades = []
+        for _ in range(count):
+            trade, offset = decode_trade(buffer, offset, instrument)
+            trades.append(trade)
+        return trades, offset
+    raise ValueError(f"Unknown result kind {kind} at offset {offset}")
+
+
+def encode_trade(trade: Trade) -> bytes:
+    return encode_fill(trade.bid_trade.order_id, trade.ask_trade.order_id, trade.bid_trade.price_ticks, trade.bid_trade.quantity)
+
+
+def encode_fill(bid_id: int, ask_id: int, price_ticks: int, quantity: int) -> bytes:
+    """Same layout as encode_trade, from the raw fields of a TradeBuffer row."""
+    return _TRADE.pack(bid_id, ask_id, price_ticks, quantity)
+
+
+def decode_trade(buffer, offset: int, instrument: Instrument) -> Tuple[Trade, int]:
+    bid_id, ask_id, price_ticks, quantity = _TRADE.unpack_from(buffer, offset)
+    trade = Trade(TradeInfo(bid_id, price_ticks, quantity, instrument), TradeInfo(ask_id, price_ticks, quantity, instrument))
+    return trade, offset + _TRADE.size
@@ -0,0 +1,177 @@
+"""Replays recorded order flow through an OrderBook as fast as it will go.
+
+Recorded flow uses the journal format from Persistence/Journal.py: every
+command with the nanosecond timestamp it arrived at, so a book's own journal
+can be replayed as is. The book runs on a ManualClock that is set to each
+record's timestamp, which makes the trades a pure function of the file; the
+SHA-256 of the trade output is printed so runs can be compared.
+
+    python -m Replay.Replay flow.bin --generate 200000 --seed 7
+    python -m Replay.Replay flow.bin --runs 2
+"""
+import argparse
+from dataclasses import dataclass
+import hashlib
+import logging
+import os
+import random
+import struct
+import time
+from typing import Iterable, List, Tuple
+
+from Auction.Auction import AuctionCommand
+from Clock.Clock import ManualClock
+from Instrument.Instrument import Instrument
+from Order.Order import Order
+from Order.OrderCancel import OrderCancel
+from Order.OrderEnums import OrderSide, OrderType
+from Order.OrderModify import OrderModify
+from Orderbook.Orderbook import OrderBook
+from Persistence.Journal import Journal, read_journal
+from Protocol.Codec import Message
+from Trade.TradeBuffer import TradeSlice
+
+logger = logging.getLogger(__name__)
+
+## bid_id, ask_id, price_ticks, quantity, timestamp_ns, aggressor code: one fill as fed to the digest
+_FILL = struct.Struct('<qqqqqb')
+
+
+@dataclass
+class ReplayReport:
+    _commands: int
+    _fills: int
+    _seconds: float
+    _digest: str
+
+    @property
+    def commands(self) -> int:
+        return self._commands
+
+    @property
+    def fills(self) -> int:
+        return self._fills
+
+    @property
+    def seconds(self) -> float:
+        return self._seconds
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 over every fill, in order; equal digests mean bit-identical trade output."""
+        return self._digest
+
+    @property
+    def commands_per_second(self) -> float:
+        return self._commands / self._seconds if self._seconds else 0.0
+
+    def __str__(self):
+        return (f"{self._commands:,} commands, {self._fills:,} fills in {self._seconds:.2f}s "
+                f"({self.commands_per_second:,.0f} commands/s), trades sha256 {self._digest}")
+
+
+def replay(path: str, instrument: Instrument) -> ReplayReport:
+    """Feeds every command in ``path`` into a fresh book and digests the fills it produces."""
+    clock = ManualClock()
+    book = OrderBook(use_threads=False, instrument=instrument, clock=clock)
+    digest = hashlib.sha256()
+    pack = _FILL.pack
+    commands = fills = 0
+    start = time.perf_counter()
+    try:
+        for _, timestamp_ns, message in read_journal(path):
+            clock.set(timestamp_ns)
+            if isinstance(message, Order):
+                result = book.add_order(message)
+            elif isinstance(message, OrderCancel):
+                result = book.cancel_order(message.order_id)
+            elif isinstance(message, AuctionCommand):
+                if message.begin:
+                    book.begin_auction()
+                    result = None
+                else:
+                    result = book.end_auction().trades
+            else:
+                result = book.order_modify(message)
+            commands += 1
+            if isinstance(result, TradeSlice) and result:
+                rows = list(result.rows())
+                digest.update(b"".join(pack(*row) for row in rows))
+                fills += len(rows)
+        elapsed = time.perf_counter() - start
+    finally:
+        book.shutdown()
+    return ReplayReport(commands, fills, elapsed, digest.hexdigest())
+
+
+def record_flow(path: str, flow: Iterable[Tuple[int, Message]]):
+    """Writes ``(timestamp_ns, command)`` pairs to ``path`` in the journal format, replacing any existing file."""
+    if os.path.exists(path):
+        os.remove(path)
+    journal = Journal(path, fsync=False)
+    for timestamp_ns, message in flow:
+        journal.append(timestamp_ns, message)
+    journal.close()
+
+
+def generate_flow(count: int, seed: int, start_ns: int = 1_700_000_000_000_000_000) -> List[Tuple[int, Message]]:
+    """Seeded synthetic flow: limit orders around a drifting mid, cancels, modifies and marketable FAK/FOK orders."""
+    rng = random.Random(seed)
+    flow: List[Tuple[int, Message]] = []
+    live: List[Tuple[int, OrderSide]] = [] ## orders that may still be resting
+    timestamp_ns, mid, next_id = start_ns, 10_000, 1
+    while len(flow) < count:
+        timestamp_ns += int(rng.expovariate(1 / 20_000)) ## about 50k messages a second
+        mid += rng.choice((-1, 0, 0, 0, 1))
+        r = rng.random()
+        if live and r < 0.25:
+            index = rng.randrange(len(live))
+            live[index], live[-1] = live[-1], live[index]
+            order_id, _ = live.pop()
+            flow.append((timestamp_ns, OrderCancel(order_id)))
+            continue
+        if live and r < 0.3:
+            order_id, side = live[rng.randrange(len(live))]
+            price = mid - rng.randint(1, 20) if side == OrderSide.BUY else mid + rng.randint(1, 20)
+            flow.append((timestamp_ns, OrderModify(order_id, side, price / 100, rng.randint(1, 50))))
+            continue
+
+        side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+        direction = 1 if side == OrderSide.BUY else -1
+        if r < 0.4:
+            order_type = rng.choice((OrderType.FillAndKill, OrderType.FillOrKill))
+            price = mid + direction * rng.randint(0, 10)
+        else:
+            order_type = OrderType.GoodTillCancel
+            price = mid - direction * rng.randint(0, 30)
+            live.append((next_id, side))
+        flow.append((timestamp_ns, Order(order_type, next_id, side, price / 100, rng.randint(1, 50))))
+        next_id += 1
+    return flow
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("flow", help="recorded flow in the journal format")
+    parser.add_argument("--symbol", default="DEMO")
+    parser.add_argument("--tick-size", type=float, default=0.01)
+    parser.add_argument("--generate", type=int, metavar="N", help="first write N synthetic commands to FLOW")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--runs", type=int, default=1, help="replay several times and check the trades are identical")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if args.generate:
+        record_flow(args.flow, generate_flow(args.generate, args.seed))
+    instrument = Instrument(args.symbol, args.tick_size)
+    digests = set()
+    for run in range(args.runs):
+        report = replay(args.flow, instrument)
+        digests.add(report.digest)
+        print(f"run {run + 1}: {report}")
+    if args.runs > 1:
+        print("trade output identical across runs" if len(digests) == 1 else "TRADE OUTPUT DIFFERS BETWEEN RUNS")
+
+
+if __name__ == "__main__":
+    main()
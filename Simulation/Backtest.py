@@ -0,0 +1,135 @@
+"""Batch backtest: NumPy-generated order flow through OrderBook.ingest, fills and depth out as arrays.
+
+Generates the flow with Simulation.OrderFlow, then feeds it to a direct-call
+book on a ManualClock in blocks of ``--block`` rows. Each block is one
+``OrderBook.ingest`` call stamped at the block's last arrival time. After
+every block the fills are copied out of the trade ring, and the best
+``--levels`` levels per side are sampled into a depth time series. Both are
+written to one ``.npz`` file. ``--compare`` also replays the first N rows
+through ``add_order``/``cancel_order`` with Order objects, to compare
+ingestion rates and check both paths leave the same book.
+
+    python -m Simulation.Backtest --orders 1000000 --output run.npz
+    python -m Simulation.Backtest --orders 200000 --compare 200000
+"""
+import argparse
+import logging
+import time
+from typing import Dict
+
+from Clock.Clock import ManualClock
+from Instrument.Instrument import Instrument
+from Order.OrderCancel import OrderCancel
+from Orderbook.Orderbook import OrderBook
+from Simulation.OrderFlow import generate_flow, np, to_messages
+from Trade.TradeBuffer import COLUMNS
+
+
+def backtest(flow: Dict[str, "np.ndarray"], instrument: Instrument = None, block: int = 10_000, levels: int = 5,
+             book: OrderBook = None) -> Dict[str, "np.ndarray"]:
+    """Runs ``flow`` through a book block by block and returns its fills and depth series as arrays.
+
+    Fill columns are named as in TradeBuffer (``bid_ids``, ``prices``, ...),
+    in the order the fills happened. The depth series holds one row per
+    block: ``depth_timestamps`` and, for ``bid`` and ``ask``,
+    ``<side>_prices`` and ``<side>_quantities`` of shape (blocks, levels),
+    best level first, with zeros where a side has fewer levels. A fresh
+    book on a ManualClock is used unless ``book`` is given; its trade ring
+    must hold a whole block's fills.
+    """
+    if np is None:
+        raise ImportError("Simulation.Backtest requires numpy")
+    own_book = book is None
+    if own_book:
+        book = OrderBook(use_threads=False, instrument=instrument, clock=ManualClock(), trade_buffer_size=1 << 20)
+    rows = len(flow["kinds"])
+    blocks = -(-rows // block)
+    fills = {name: [] for name in COLUMNS}
+    depth = {"depth_timestamps": np.zeros(blocks, dtype=np.int64)}
+    for name in ("bid_prices", "bid_quantities", "ask_prices", "ask_quantities"):
+        depth[name] = np.zeros((blocks, levels), dtype=np.int64)
+
+    timestamps = flow["timestamps"]
+    try:
+        for index, start in enumerate(range(0, rows, block)):
+            end = min(start + block, rows)
+            now_ns = int(timestamps[end - 1])
+            book.clock.set(now_ns)
+            trades = book.ingest(flow["kinds"][start:end], flow["order_ids"][start:end], flow["sides"][start:end],
+                                 flow["order_types"][start:end], flow["prices"][start:end], flow["quantities"][start:end])
+            ## copy out now, the ring is reused by later blocks
+            for name, column in trades.to_numpy().items():
+                fills[name].append(column.copy())
+            depth["depth_timestamps"][index] = now_ns
+            snapshot = book.get_depth(levels)
+            for side, infos in (("bid", snapshot.bids), ("ask", snapshot.asks)):
+                for level, info in enumerate(infos):
+                    depth[f"{side}_prices"][index, level] = info.price_ticks
+                    depth[f"{side}_quantities"][index, level] = info.quantity
+    finally:
+        if own_book:
+            book.shutdown()
+
+    result = {name: np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64) for name, parts in fills.items()}
+    result.update(depth)
+    return result
+
+
+def replay_per_order(flow: Dict[str, "np.ndarray"], rows: int, instrument: Instrument) -> OrderBook:
+    """The same rows through the per-order API, one Order or OrderCancel at a time."""
+    clock = ManualClock()
+    book = OrderBook(use_threads=False, instrument=instrument, clock=clock, trade_buffer_size=1 << 20)
+    for timestamp_ns, message in to_messages(flow, instrument, 0, rows):
+        clock.set(timestamp_ns)
+        if isinstance(message, OrderCancel):
+            book.cancel_order(message.order_id)
+        else:
+            book.add_order(message)
+    return book
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1_000_000, help="commands to generate, adds and cancels")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--block", type=int, default=10_000, help="rows per ingest call")
+    parser.add_argument("--levels", type=int, default=5, help="depth levels sampled per side")
+    parser.add_argument("--cancel-ratio", type=float, default=0.4)
+    parser.add_argument("--output", help="write fills and the depth series to this .npz file")
+    parser.add_argument("--compare", type=int, default=0, metavar="N", help="also run the first N rows through add_order")
+    args = parser.parse_args()
+    ## the per-order path warns on every cancel that lost the race to a fill; keep that out of the timings
+    logging.basicConfig(level=logging.ERROR, format="%(asctime)s [%(levelname)s] %(message)s")
+    instrument = Instrument("SIM", 0.01)
+
+    started = time.perf_counter()
+    flow = generate_flow(args.orders, args.seed, cancel_ratio=args.cancel_ratio)
+    generated = time.perf_counter() - started
+    print(f"generated {args.orders:,} commands in {generated:.3f}s ({args.orders / generated:,.0f}/s)")
+
+    started = time.perf_counter()
+    result = backtest(flow, instrument, args.block, args.levels)
+    ingested = time.perf_counter() - started
+    print(f"ingested  {args.orders:,} commands in {ingested:.3f}s ({args.orders / ingested:,.0f}/s), "
+          f"{len(result['prices']):,} fills, {int(result['quantities'].sum()):,} traded")
+
+    if args.compare:
+        rows = min(args.compare, args.orders)
+        started = time.perf_counter()
+        book = replay_per_order(flow, rows, instrument)
+        per_order = time.perf_counter() - started
+        print(f"per-order {rows:,} commands in {per_order:.3f}s ({rows / per_order:,.0f}/s)")
+        bulk = OrderBook(use_threads=False, instrument=instrument, clock=ManualClock(), trade_buffer_size=1 << 20)
+        fills = backtest({name: column[:rows] for name, column in flow.items()}, instrument, args.block, args.levels, bulk)
+        same = str(book.get_order_infos()) == str(bulk.get_order_infos()) and book.stats()["gauges"]["trades"] == len(fills["prices"])
+        print(f"fills and resting book after {rows:,} rows {'match' if same else 'DIFFER from'} the per-order path")
+        book.shutdown()
+        bulk.shutdown()
+
+    if args.output:
+        np.savez(args.output, **result)
+        print(f"wrote {len(result)} arrays to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from typing import Dict, Iterator, Tuple
+
+from Instrument.Instrument import Instrument
+from Order.Order import Order
+from Order.OrderCancel import OrderCancel
+from Order.OrderEnums import OrderSide, OrderType
+from Order.OrderStore import ORDER_TYPES, ORDER_TYPE_CODES, SIDE_CODES, SIDES
+from Orderbook.Orderbook import INGEST_ADD, INGEST_CANCEL
+
+try:
+    import numpy as np
+except ImportError: ## the simulator is built on NumPy; everything else in the repo runs without it
+    np = None
+
+## one array per column, one row per command, in arrival order
+FLOW_COLUMNS = ("timestamps", "kinds", "order_ids", "sides", "order_types", "prices", "quantities")
+## order types the generator draws from, with their default shares of the adds
+DEFAULT_TYPE_MIX = ((OrderType.GoodTillCancel, 0.90), (OrderType.FillAndKill, 0.06),
+                    (OrderType.FillOrKill, 0.02), (OrderType.Market, 0.02))
+
+
+def generate_flow(count: int, seed: int = 7, mid_ticks: int = 10_000, rate: float = 1e6, cancel_ratio: float = 0.4,
+                  mean_offset: float = 4.0, mean_size: float = 20.0, mean_cancel_lag: float = 50.0, volatility: float = 0.05,
+                  type_mix=DEFAULT_TYPE_MIX, start_ns: int = 1_700_000_000_000_000_000) -> Dict[str, "np.ndarray"]:
+    """Generates ``count`` adds and cancels as whole NumPy columns, without a Python loop.
+
+    Arrivals are Poisson at ``rate`` per second. The mid price is a random
+    walk that moves a tick with probability ``volatility`` per command. Limit
+    prices sit a geometric number of ticks (mean ``mean_offset``) behind the
+    mid on their own side, starting one tick through it, so a share of the
+    limit orders is marketable. Sizes are lognormal around ``mean_size``.
+    About ``cancel_ratio`` of the rows cancel the order added
+    ``mean_cancel_lag`` adds earlier on average; that order may have traded
+    away already, just like a real cancel that races a fill. Order ids count
+    up from 1 over the adds. Sides and order types are OrderStore codes and
+    prices are in ticks, ready for ``OrderBook.ingest``.
+    """
+    if np is None:
+        raise ImportError("Simulation.OrderFlow requires numpy")
+    if count <= 0:
+        raise ValueError("count must be a positive number of commands")
+    rng = np.random.default_rng(seed)
+
+    timestamps = start_ns + np.cumsum(rng.exponential(1e9 / rate, count)).astype(np.int64)
+    is_cancel = rng.random(count) < cancel_ratio
+    is_cancel[0] = False ## nothing to cancel yet
+    kinds = np.where(is_cancel, INGEST_CANCEL, INGEST_ADD).astype(np.int8)
+
+    ## adds take the next id; a cancel points back at one of the adds before it
+    adds_so_far = np.cumsum(~is_cancel)
+    lags = rng.geometric(1.0 / mean_cancel_lag, count) - 1
+    order_ids = np.where(is_cancel, np.maximum(adds_so_far - lags, 1), adds_so_far).astype(np.int64)
+
+    sides = rng.integers(0, 2, count, dtype=np.int8)
+    types, shares = zip(*type_mix)
+    order_types = rng.choice(np.array([ORDER_TYPE_CODES[order_type] for order_type in types], dtype=np.int8), count,
+                             p=np.array(shares) / sum(shares))
+
+    steps = rng.choice(np.array([-1, 0, 1], dtype=np.int64), count, p=(volatility / 2, 1 - volatility, volatility / 2))
+    mid = mid_ticks + np.cumsum(steps)
+    offsets = rng.geometric(1.0 / mean_offset, count) - 2 ## -1 is one tick through the mid
+    prices = np.where(sides == SIDE_CODES[OrderSide.BUY], mid - offsets, mid + offsets)
+    prices = np.where(order_types == ORDER_TYPE_CODES[OrderType.Market], 0, np.maximum(prices, 1))
+    quantities = np.maximum(1, rng.lognormal(np.log(mean_size), 0.75, count)).astype(np.int64)
+
+    return {"timestamps": timestamps, "kinds": kinds, "order_ids": order_ids, "sides": sides,
+            "order_types": order_types, "prices": prices, "quantities": quantities}
+
+
+def to_messages(flow: Dict[str, "np.ndarray"], instrument: Instrument, start: int = 0, end: int = None) -> Iterator[Tuple[int, object]]:
+    """Yields ``(timestamp_ns, Order or OrderCancel)`` for rows ``[start, end)``, for the per-order API and journals."""
+    end = len(flow["kinds"]) if end is None else end
+    rows = zip(*(flow[name][start:end].tolist() for name in FLOW_COLUMNS))
+    for timestamp, kind, order_id, side, order_type, price, quantity in rows:
+        if kind == INGEST_CANCEL:
+            yield timestamp, OrderCancel(order_id)
+        else:
+            yield timestamp, Order(ORDER_TYPES[order_type], order_id, SIDES[side], instrument.to_price(price), quantity)
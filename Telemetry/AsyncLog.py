@@ -0,0 +1,77 @@
+from collections import deque
+import logging
+import threading
+from typing import Deque, Tuple
+
+## (level, %-style template, args) as queued by the matching path
+Record = Tuple[int, str, tuple]
+
+
+class HotPathLog:
+    """Logs the book's per-command events straight through ``logger``.
+
+    Templates use %-style placeholders and are only formatted by logging once
+    a handler wants the record. Callers check ``enabled_for`` once per
+    command, so a disabled level costs a local boolean per event and nothing
+    is built.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+
+    @property
+    def logger(self) -> logging.Logger:
+        return self._logger
+
+    def enabled_for(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def log(self, level: int, template: str, *args):
+        self._logger.log(level, template, *args)
+
+    def close(self):
+        pass
+
+
+class AsyncHotPathLog(HotPathLog):
+    """Queues the book's per-command events and logs them from a background thread.
+
+    ``log`` only appends a ``(level, template, args)`` tuple to a deque, an
+    atomic step under the GIL, so no lock, LogRecord, formatting or handler
+    I/O happens while the book holds its mutex. The writer thread wakes every
+    ``interval`` seconds, drains the deque and hands each record to the
+    underlying logger; record timestamps are therefore the time of writing,
+    up to ``interval`` after the event. Args must be immutable values taken
+    at the time of the event, not live objects.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = 0.05):
+        super().__init__(logger)
+        self._records: Deque[Record] = deque()
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="hot-path-log-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def pending(self) -> int:
+        return len(self._records)
+
+    def log(self, level: int, template: str, *args):
+        self._records.append((level, template, args))
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        records, log = self._records, self._logger.log
+        while records:
+            level, template, args = records.popleft()
+            log(level, template, *args)
+
+    def close(self):
+        """Writes what is still queued and stops the writer thread."""
+        self._stopped.set()
+        self._writer.join()
@@ -0,0 +1,196 @@
+from array import array
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+## each power of two is split into this many linear sub-buckets, so a recorded value is off by at most 1/32
+_SUB_BUCKET_BITS = 5
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+## values up to 2**40 (about 18 minutes in nanoseconds) get their own bucket; larger ones land in the last
+_MAX_EXPONENT = 40
+_BUCKETS = (_MAX_EXPONENT - _SUB_BUCKET_BITS + 1) * _SUB_BUCKETS
+SUMMARY_PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p99.9", 0.999))
+
+
+def _bucket(value: int) -> int:
+    if value < 2 * _SUB_BUCKETS:
+        return value if value > 0 else 0
+    exponent = value.bit_length() - _SUB_BUCKET_BITS - 1
+    return min((exponent + 1) * _SUB_BUCKETS + (value >> exponent) - _SUB_BUCKETS, _BUCKETS - 1)
+
+
+def _highest_value(bucket: int) -> int:
+    """Largest value that is recorded into ``bucket``."""
+    if bucket < 2 * _SUB_BUCKETS:
+        return bucket
+    exponent = bucket // _SUB_BUCKETS - 1
+    return ((bucket % _SUB_BUCKETS + _SUB_BUCKETS) << exponent) + (1 << exponent) - 1
+
+
+class Histogram:
+    """Fixed-size HDR-style histogram of non-negative integers.
+
+    Buckets are exact up to 64 and log-linear above that, 32 per power of
+    two, so every percentile is within about 3% of the true value while
+    recording is a bit-length, a shift and an array increment. Nothing is
+    allocated after construction.
+    """
+
+    def __init__(self, name: str, unit: str = "ns"):
+        self._name = name
+        self._unit = unit
+        self._counts = array('q', bytes(8 * _BUCKETS))
+        self._count = 0
+        self._total = 0
+        self._min: Optional[int] = None
+        self._max = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def unit(self) -> str:
+        return self._unit
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def max(self) -> int:
+        return self._max
+
+    @property
+    def mean(self) -> float:
+        return self._total / self._count if self._count else 0.0
+
+    def record(self, value: int):
+        self._counts[_bucket(value)] += 1
+        self._count += 1
+        self._total += value
+        if value > self._max:
+            self._max = value
+        if self._min is None or value < self._min:
+            self._min = value
+
+    def percentile(self, fraction: float) -> int:
+        if not self._count:
+            return 0
+        rank = max(1, round(fraction * self._count))
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(_highest_value(bucket), self._max)
+        return self._max
+
+    def reset(self):
+        self._counts = array('q', bytes(8 * _BUCKETS))
+        self._count = self._total = self._max = 0
+        self._min = None
+
+    def summary(self) -> Dict[str, float]:
+        summary = {"count": self._count, "min": self._min or 0, "mean": self.mean, "max": self._max}
+        summary.update((name, self.percentile(fraction)) for name, fraction in SUMMARY_PERCENTILES)
+        return summary
+
+    def __repr__(self):
+        return f"Histogram({self._name!r}, count={self._count}, p50={self.percentile(0.5)}{self._unit})"
+
+
+class Metrics:
+    """Latency histograms and counters for one OrderBook.
+
+    The book only touches these when it was built with ``metrics=True``;
+    otherwise the hot path pays a single ``None`` check per command. Command
+    and match latencies and the counters are recorded under the book's mutex.
+    Queue depth is sampled by the submitting thread (executor mode) or the
+    matcher thread (sequenced mode), so it is a sample, not an exact series.
+    """
+
+    def __init__(self):
+        self.add = Histogram("add")
+        self.cancel = Histogram("cancel")
+        self.modify = Histogram("modify")
+        self.match = Histogram("match")
+        self.lock_wait = Histogram("lock_wait")
+        self.queue_depth = Histogram("queue_depth", unit="")
+        self.ingest = Histogram("ingest") ## one value per OrderBook.ingest block, not per row
+        self.adds = 0
+        self.cancels = 0
+        self.cancel_misses = 0
+        self.modifies = 0
+        self.modifies_in_place = 0
+        self.fills = 0
+        self.filled_quantity = 0
+        self.expired = 0
+
+    @property
+    def histograms(self):
+        return (self.add, self.cancel, self.modify, self.match, self.lock_wait, self.queue_depth, self.ingest)
+
+    def counters(self) -> Dict[str, int]:
+        return {
+            "adds": self.adds,
+            "cancels": self.cancels,
+            "cancel_misses": self.cancel_misses,
+            "modifies": self.modifies,
+            "modifies_in_place": self.modifies_in_place,
+            "fills": self.fills,
+            "filled_quantity": self.filled_quantity,
+            "expired": self.expired,
+        }
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": self.counters(),
+            "histograms": {histogram.name: histogram.summary() for histogram in self.histograms},
+        }
+
+    def reset(self):
+        for histogram in self.histograms:
+            histogram.reset()
+        for name in self.counters():
+            setattr(self, name, 0)
+
+
+def format_stats(stats: dict) -> str:
+    """One-line rendering of ``OrderBook.stats()`` for logs."""
+    parts = [f"{name}={value}" for name, value in stats.get("gauges", {}).items()]
+    parts += [f"{name}={value}" for name, value in stats.get("counters", {}).items()]
+    for name, summary in stats.get("histograms", {}).items():
+        if summary["count"]:
+            parts.append(f"{name}[n={summary['count']} p50={summary['p50']} p99={summary['p99']} max={summary['max']}]")
+    return " ".join(parts)
+
+
+class MetricsReporter:
+    """Background thread that hands ``source()`` to ``emit`` every ``interval`` seconds."""
+
+    def __init__(self, source: Callable[[], dict], interval: float, emit: Optional[Callable[[dict], None]] = None):
+        if interval <= 0:
+            raise ValueError("interval must be a positive number of seconds")
+        self._source = source
+        self._interval = interval
+        self._emit = emit or (lambda stats: logger.info(f"OrderBook stats: {format_stats(stats)}"))
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-reporter", daemon=True)
+        self._thread.start()
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                self._emit(self._source())
+            except Exception:
+                logger.exception("Metrics report failed")
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
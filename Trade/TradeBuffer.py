@@ -0,0 +1,233 @@
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from Instrument.Instrument import Instrument
+from Order.OrderStore import SIDES
+from Trade.TradeInfo import Trade, TradeInfo
+
+try:
+    import numpy as np
+except ImportError: ## numpy is only needed for to_numpy
+    np = None
+
+COLUMNS = ("bid_ids", "ask_ids", "prices", "quantities", "timestamps", "aggressors")
+## aggressor code of a fill neither side initiated, such as an auction uncross
+NO_AGGRESSOR = -1
+
+
+@dataclass(frozen=True)
+class LevelFill:
+    """Everything one command traded at one price level, summed over the resting orders it hit."""
+    _price_ticks: int
+    _quantity: int
+    _fills: int
+    _instrument: Instrument = field(repr=False)
+
+    @property
+    def price(self) -> float:
+        return self._instrument.to_price(self._price_ticks)
+
+    @property
+    def price_ticks(self) -> int:
+        return self._price_ticks
+
+    @property
+    def quantity(self) -> int:
+        return self._quantity
+
+    @property
+    def fills(self) -> int:
+        """Number of resting orders traded against at this level."""
+        return self._fills
+
+    def __repr__(self):
+        return f"LevelFill({self._quantity} @ {self.price} in {self._fills} fills)"
+
+
+class TradeBuffer:
+    """Preallocated columnar ring of the fills a book has produced.
+
+    Every fill is one row across parallel ``array`` columns: buyer and seller
+    order ids, price in ticks, quantity, timestamp in nanoseconds and the
+    aggressor's side code. Rows are addressed by a sequence number that keeps
+    growing; once ``capacity`` more fills have been recorded a row is
+    overwritten, and reading it raises IndexError. Trade objects are only
+    built when a row is read through ``trade`` or a TradeSlice.
+    """
+
+    def __init__(self, instrument: Instrument, capacity: int = 1 << 16):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("capacity must be a positive power of two")
+        self._instrument = instrument
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self.bid_ids = array('q', bytes(8 * capacity))
+        self.ask_ids = array('q', bytes(8 * capacity))
+        self.prices = array('q', bytes(8 * capacity)) ## in ticks
+        self.quantities = array('q', bytes(8 * capacity))
+        self.timestamps = array('q', bytes(8 * capacity)) ## nanoseconds since the epoch
+        self.aggressors = array('b', bytes(capacity)) ## side codes from OrderStore, or NO_AGGRESSOR
+        self._position = 0 ## sequence number of the next fill, only advanced once its row is written
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def position(self) -> int:
+        return self._position
+
+    def record(self, bid_id: int, ask_id: int, price: int, quantity: int, timestamp: int, aggressor: int):
+        index = self._position & self._mask
+        self.bid_ids[index] = bid_id
+        self.ask_ids[index] = ask_id
+        self.prices[index] = price
+        self.quantities[index] = quantity
+        self.timestamps[index] = timestamp
+        self.aggressors[index] = aggressor
+        self._position += 1
+
+    def slice(self, start: int, end: Optional[int] = None) -> "TradeSlice":
+        return TradeSlice(self, start, self._position if end is None else end)
+
+    def empty(self) -> "TradeSlice":
+        return TradeSlice(self, self._position, self._position)
+
+    def trade(self, sequence: int) -> Trade:
+        if not 0 <= sequence < self._position:
+            raise IndexError(f"no trade with sequence {sequence}")
+        index = sequence & self._mask
+        bid_id, ask_id = self.bid_ids[index], self.ask_ids[index]
+        price, quantity = self.prices[index], self.quantities[index]
+        timestamp, aggressor = self.timestamps[index], self.aggressors[index]
+        ## the writer only starts on sequence + capacity after finishing the one before it
+        if self._position >= sequence + self._capacity:
+            raise IndexError(f"trade {sequence} has been overwritten, the buffer only holds the last {self._capacity}")
+        instrument = self._instrument
+        return Trade(TradeInfo(bid_id, price, quantity, instrument), TradeInfo(ask_id, price, quantity, instrument),
+                     timestamp, None if aggressor == NO_AGGRESSOR else SIDES[aggressor])
+
+    def rows(self, start: int, end: int) -> Iterator[Tuple[int, int, int, int, int, int]]:
+        """Yields ``(bid_id, ask_id, price_ticks, quantity, timestamp_ns, aggressor code)`` for ``[start, end)``."""
+        if start < self._position - self._capacity:
+            raise IndexError(f"trade {start} has been overwritten, the buffer only holds the last {self._capacity}")
+        mask = self._mask
+        bid_ids, ask_ids, prices = self.bid_ids, self.ask_ids, self.prices
+        quantities, timestamps, aggressors = self.quantities, self.timestamps, self.aggressors
+        for sequence in range(start, end):
+            index = sequence & mask
+            yield bid_ids[index], ask_ids[index], prices[index], quantities[index], timestamps[index], aggressors[index]
+
+    def filled(self, start: int, end: int) -> int:
+        """Total quantity of the fills in ``[start, end)``."""
+        quantities, mask = self.quantities, self._mask
+        return sum(quantities[sequence & mask] for sequence in range(start, end))
+
+    def level_fills(self, start: int, end: int) -> List[LevelFill]:
+        """Fills in ``[start, end)`` summed per run of consecutive fills at the same price, in order."""
+        if start < self._position - self._capacity:
+            raise IndexError(f"trade {start} has been overwritten, the buffer only holds the last {self._capacity}")
+        prices, quantities, mask, instrument = self.prices, self.quantities, self._mask, self._instrument
+        levels: List[LevelFill] = []
+        sequence = start
+        while sequence < end:
+            price, quantity, fills = prices[sequence & mask], 0, 0
+            while sequence < end and prices[sequence & mask] == price:
+                quantity += quantities[sequence & mask]
+                fills += 1
+                sequence += 1
+            levels.append(LevelFill(price, quantity, fills, instrument))
+        return levels
+
+    def to_numpy(self, start: int, end: int) -> Dict[str, "np.ndarray"]:
+        """Returns the fills in ``[start, end)`` as one NumPy array per column.
+
+        The arrays are views straight onto the ring when the range does not
+        wrap around its end, and copies when it does. Views are only valid
+        until the rows are overwritten.
+        """
+        if np is None:
+            raise ImportError("TradeBuffer.to_numpy requires numpy")
+        if start < self._position - self._capacity or end > self._position or start > end:
+            raise IndexError(f"fills {start}..{end} are not all held in the buffer")
+        first, last = start & self._mask, end & self._mask
+        exported = {}
+        for name in COLUMNS:
+            column = np.frombuffer(getattr(self, name), dtype=np.int8 if name == "aggressors" else np.int64)
+            if end - start == 0:
+                exported[name] = column[:0]
+            elif first < last or last == 0:
+                exported[name] = column[first:last or self._capacity]
+            else:
+                exported[name] = np.concatenate((column[first:], column[:last]))
+        return exported
+
+    def __repr__(self):
+        return f"TradeBuffer(position={self._position}, capacity={self._capacity})"
+
+
+class TradeSlice(Sequence):
+    """The fills one command produced, read lazily from the book's TradeBuffer.
+
+    Behaves like a list of Trade objects, but each Trade is only built when it
+    is accessed. Take what you need before the buffer wraps around.
+    """
+    __slots__ = ("_buffer", "_start", "_end")
+
+    def __init__(self, buffer: TradeBuffer, start: int, end: int):
+        self._buffer = buffer
+        self._start = start
+        self._end = end
+
+    @property
+    def start(self) -> int:
+        return self._start
+
+    @property
+    def end(self) -> int:
+        return self._end
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __bool__(self) -> bool:
+        return self._end > self._start
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TradeSlice index out of range")
+        return self._buffer.trade(self._start + index)
+
+    def __iter__(self) -> Iterator[Trade]:
+        trade = self._buffer.trade
+        for sequence in range(self._start, self._end):
+            yield trade(sequence)
+
+    def rows(self) -> Iterator[Tuple[int, int, int, int, int, int]]:
+        """Raw fill rows, see TradeBuffer.rows; no Trade objects are built."""
+        return self._buffer.rows(self._start, self._end)
+
+    def quantity(self) -> int:
+        """Total quantity filled, without building any Trade objects."""
+        return self._buffer.filled(self._start, self._end)
+
+    def level_fills(self) -> List[LevelFill]:
+        """One aggregated report per price level traded through, best price first."""
+        return self._buffer.level_fills(self._start, self._end)
+
+    def to_numpy(self) -> Dict[str, "np.ndarray"]:
+        return self._buffer.to_numpy(self._start, self._end)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (TradeSlice, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"TradeSlice({list(self)!r})"
@@ -1,13 +1,18 @@
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from typing import Optional
+
+from Instrument.Instrument import Instrument
+from Order.OrderEnums import OrderSide
 
 
 @dataclass
 class TradeInfo:
     _order_id: int
-    _price: float
+    _price_ticks: int
     _quantity: int
+    _instrument: Instrument = field(repr=False)
     
     @property
     def order_id(self):
@@ -15,7 +20,11 @@ class TradeInfo:
     
     @property
     def price(self):
-        return self._price
+        return self._instrument.to_price(self._price_ticks)
+    
+    @property
+    def price_ticks(self):
+        return self._price_ticks
     
     @property
     def quantity(self):
@@ -35,7 +44,7 @@ class TradeInfo:
         
         if price < 0:
             raise ValueError("price must be positive")
-        self._price = float(price)
+        self._price_ticks = self._instrument.to_ticks(price)
 
     @quantity.setter
     def quantity(self, quantity: int):
@@ -56,9 +65,14 @@ class TradeInfo:
 class Trade:
     _bid_trade: TradeInfo
     _ask_trade: TradeInfo
+    _timestamp_ns: Optional[int] = None ## stamped now when not given
+    _aggressor: Optional[OrderSide] = None
     
     def __post_init__(self):
-        self._timestamp = datetime.now(timezone.utc)
+        if self._timestamp_ns is None:
+            self._timestamp = datetime.now(timezone.utc)
+        else:
+            self._timestamp = datetime.fromtimestamp(self._timestamp_ns / 1e9, tz=timezone.utc)
     
     @property
     def bid_trade(self) -> TradeInfo:
@@ -68,6 +82,10 @@ class Trade:
     def ask_trade(self) -> TradeInfo:
         return self._ask_trade
     
+    @property
+    def aggressor(self) -> Optional[OrderSide]:
+        return self._aggressor
+    
     def timezone(self) -> datetime:
         return self._timestamp
     